@@ -1,59 +1,166 @@
+import multiprocessing
+import queue
+import random
 import time
-from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from result_cache import solve_cached
+
+def luby(i):
+    # i-th term (from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ...
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 1 << seq
 
 class CDCLSolver:
     def __init__(self):
+        # Original clauses followed by learned ones, so clause ids index it directly
         self.clauses = []
+        self.num_original = 0  # Clauses before this index come from the input
         self.variables = set()
-        self.assignment = {}
+        self.num_vars = 0
+        # Truth byte per literal, indexed like watch_list: bit 0 = assigned,
+        # bit 1 = true. So 3 is a true literal, 1 a false one, 0 unassigned.
+        self.value = bytearray()
+        self.seen = bytearray()
         self.decision_level = 0
-        self.var_info = {}  # Stores decision level and antecedent clause for each variable
-        self.watch_list = defaultdict(list)
-        self.occurrences = defaultdict(int)
-        self.learned_clauses = []
+        # Per-variable arrays, indexed by variable
+        self.level = []  # Decision level of the assignment
+        self.reason = []  # Antecedent clause index, None for decisions
+        self.phase = bytearray()  # Last polarity, 1 for true, used for decisions
+        self.watch_list = []
+        self.bin_watch = []  # Binary clauses: literal -> (other literal, clause_idx)
+        # Literal -> ids of clauses it satisfies whose watch was parked until it is unassigned
+        self.inactive_watches = []
+        self.inactive_level = 1  # Only park watches of clauses satisfied up to this level
+        self.inactive_min_len = 5  # Shorter clauses are cheaper to rescan than to park
         self.trail = []
         self.trail_lim = []
+        self.qhead = 0  # Index of the next trail literal to propagate
         self.conflict_count = 0
-        self.restart_threshold = 100
-        self.var_activity = defaultdict(float)
-        self.var_order = []
+        self.restart_unit = 100  # Conflicts per Luby step
+        self.restart_count = 0
+        self.restart_threshold = self.restart_unit * luby(0)
+        self.var_activity = []
+        self.var_inc = 1.0  # Bump amount, grows instead of decaying every activity
+        self.var_decay = 0.95
+        self.order_heap = []  # Binary max-heap of variables keyed by activity
+        self.heap_pos = []  # Position of each variable in order_heap, -1 if absent
+        self.cache_path = None  # sqlite file of earlier results (e.g. DEFAULT_CACHE_PATH), None to disable
+        self.cache_hit = False  # Whether solve() answered from the cache without searching
+        self.seed = None  # Randomizes activity ties and initial phases when set
+        # (stop event, inbox queue per worker, own worker index) inside solve_portfolio
+        self.portfolio = None
+        self.shared_max_len = 3  # Longest learned clause sent to other workers
+        self.stop_check_interval = 64  # Conflicts between looks at the portfolio stop event
+        self.last_exported = 0  # Clauses before this index were already shared
 
     def parse_dimacs(self, dimacs_str):
         lines = dimacs_str.split('\n')
         for line in lines:
             line = line.strip()
-            if not line or line.startswith('c') or line.startswith('p'):
+            if not line or line.startswith('c'):
+                continue
+            if line.startswith('p'):
+                # p cnf <num_vars> <num_clauses>: size the per-variable arrays
+                self.num_vars = int(line.split()[2])
                 continue
             clause = []
-            for lit in line.split()[:-1]:  # Skip the 0 at end
-                lit = int(lit)
+            for tok in line.split():
+                lit = int(tok)
                 if lit == 0:
-                    continue
+                    break  # End of clause
                 var = abs(lit)
                 self.variables.add(var)
                 clause.append(lit)
             if clause:
-                self.clauses.append(tuple(clause))
+                self.clauses.append(clause)  # Mutable, watched literals live at positions 0 and 1
+        self.num_original = len(self.clauses)
         self.initialize_data_structures()
 
     def initialize_data_structures(self):
-        # Initialize watch lists and activity scores
+        # Watch lists are indexed by literal, negative literals wrap around from the end
+        num_vars = max(self.num_vars, max(self.variables, default=0))
+        self.watch_list = [[] for _ in range(2 * num_vars + 1)]
+        self.bin_watch = [[] for _ in range(2 * num_vars + 1)]
+        self.inactive_watches = [[] for _ in range(2 * num_vars + 1)]
+        self.allocate_variable_data(num_vars)
+        if self.seed is not None:
+            # Activities far below var_inc only break ties between untouched variables
+            rng = random.Random(self.seed)
+            self.var_activity = [rng.random() * 1e-6 for _ in range(num_vars + 1)]
+            self.phase = bytearray(rng.getrandbits(1) for _ in range(num_vars + 1))
+        self.last_exported = len(self.clauses)
+        
         for var in self.variables:
-            self.var_activity[var] = 0.0
-            self.var_order.append(var)
+            self.heap_insert(var)
         
         # Initialize watch lists with two watched literals per clause
         for clause_idx, clause in enumerate(self.clauses):
-            if len(clause) > 0:
-                first_lit = clause[0]
-                self.watch_list[first_lit].append(clause_idx)
-                if len(clause) > 1:
-                    second_lit = clause[1]
-                    self.watch_list[second_lit].append(clause_idx)
+            self.watch_clause(clause, clause_idx)
+            if len(clause) == 1 and not self.value[clause[0]]:
+                # Unit clauses are asserted at level 0
+                self.assign(abs(clause[0]), clause[0] > 0, clause_idx)
+
+    def allocate_variable_data(self, num_vars):
+        # Everything read once a variable is picked lives in flat arrays that
+        # share the same index, so the hot loops can hold them all as locals
+        self.value = bytearray(2 * num_vars + 1)
+        self.seen = bytearray(num_vars + 1)  # Scratch marks for conflict analysis
+        self.level = [0] * (num_vars + 1)
+        self.reason = [None] * (num_vars + 1)
+        self.phase = bytearray(b'\x01') * (num_vars + 1)
+        self.var_activity = [0.0] * (num_vars + 1)
+        self.heap_pos = [-1] * (num_vars + 1)
+
+    def watch_clause(self, clause, clause_idx):
+        # The other literal alone decides a binary clause, so those are kept
+        # apart and never need to be loaded during propagation
+        if len(clause) == 2:
+            self.bin_watch[clause[0]].append((clause[1], clause_idx))
+            self.bin_watch[clause[1]].append((clause[0], clause_idx))
+        # Watch positions 0 and 1, each entry caching the other watch as blocker
+        elif len(clause) > 2:
+            self.watch_list[clause[0]].append((clause_idx, clause[1]))
+            self.watch_list[clause[1]].append((clause_idx, clause[0]))
+        else:
+            self.watch_list[clause[0]].append((clause_idx, clause[0]))
 
     def solve(self):
         start_time = time.time()
-        result = self.cdcl()
+        result, self.cache_hit = solve_cached(self.cache_path, 'cdcl', self.clauses[:self.num_original], self.cdcl)
+        elapsed = time.time() - start_time
+        return result, elapsed
+
+    def solve_portfolio(self, n_workers=4):
+        # Race differently configured copies of the solver, first answer wins
+        start_time = time.time()
+        clauses = [list(clause) for clause in self.clauses[:self.num_original]]
+        num_vars = max(self.num_vars, max(self.variables, default=0))
+        
+        def race():
+            with multiprocessing.Manager() as manager, ProcessPoolExecutor(n_workers) as pool:
+                stop = manager.Event()
+                inboxes = [manager.Queue() for _ in range(n_workers)]
+                futures = [pool.submit(run_portfolio_worker, clauses, num_vars, (stop, inboxes, i))
+                           for i in range(n_workers)]
+                result = None
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result is not None:
+                        break
+                # The others notice within stop_check_interval conflicts, so
+                # leaving the pool does not wait for them to finish
+                stop.set()
+            return result
+        
+        result, self.cache_hit = solve_cached(self.cache_path, 'cdcl_portfolio', clauses, race)
         elapsed = time.time() - start_time
         return result, elapsed
 
@@ -70,22 +177,36 @@ class CDCLSolver:
                 
                 # Learn conflict clause and backtrack
                 learned_clause, backtrack_level = self.analyze_conflict(conflict_clause)
-                self.learned_clauses.append(learned_clause)
                 self.add_clause(learned_clause)
                 self.backtrack(backtrack_level)
                 
+                # The learned clause is now unit: assert its first literal
+                asserting_lit = learned_clause[0]
+                self.assign(abs(asserting_lit), asserting_lit > 0, len(self.clauses) - 1)
+                
                 # Bump variable activities
                 self.bump_activity(learned_clause)
                 
-                # Restart if needed
+                # Give up soon after another worker answers, without waiting
+                # for the next restart, which can be far off on hard formulas.
+                # The event lives in the manager process, so it is not asked
+                # on every conflict
+                if (self.portfolio is not None and self.conflict_count % self.stop_check_interval == 0
+                        and self.portfolio[0].is_set()):
+                    return None
+                
+                # Restart on the Luby schedule, saved phases keep the
+                # assignments found so far
                 if self.conflict_count >= self.restart_threshold:
-                    self.restart_threshold *= 1.5
+                    self.restart_count += 1
+                    self.restart_threshold = self.conflict_count + self.restart_unit * luby(self.restart_count)
                     self.backtrack(0)
+                    if self.portfolio is not None:
+                        if self.portfolio[0].is_set():
+                            return None  # Another worker already answered
+                        if not self.exchange_clauses():
+                            return False
             else:
-                # Check if all variables are assigned
-                if all(var in self.assignment for var in self.variables):
-                    return True
-                
                 # Decision - select unassigned variable
                 var = self.select_variable()
                 if var is None:
@@ -94,164 +215,329 @@ class CDCLSolver:
                 self.decision_level += 1
                 self.trail_lim.append(len(self.trail))
                 
-                # Try assigning True first (or use polarity heuristic)
-                value = True
-                self.assign(var, value, None)
+                # Phase saving: reuse the polarity the variable last had
+                self.assign(var, self.phase[var] == 1, None)
 
     def unit_propagation(self):
-        while len(self.trail) < len(self.assignment):
+        # Hot loop: bind attributes to locals to save repeated lookups
+        trail = self.trail
+        value = self.value
+        watch_list = self.watch_list
+        bin_watch = self.bin_watch
+        inactive_watches = self.inactive_watches
+        inactive_level = self.inactive_level
+        inactive_min_len = self.inactive_min_len
+        clauses = self.clauses
+        level = self.level
+        reason = self.reason
+        decision_level = self.decision_level
+        
+        while self.qhead < len(trail):
             # Get next unprocessed assignment
-            lit = next(lit for lit in self.assignment if abs(lit) not in {abs(x) for x in self.trail})
-            var = abs(lit)
-            value = lit > 0
+            lit = trail[self.qhead]
+            self.qhead += 1
             
-            # Process all clauses watching the negation of this literal
-            neg_lit = -lit
-            to_remove = []
-            for clause_idx in self.watch_list.get(neg_lit, []):
-                clause = self.clauses[clause_idx] if clause_idx < len(self.clauses) else self.learned_clauses[clause_idx - len(self.clauses)]
+            # Binary clauses containing the negation are now unit or conflicting
+            false_lit = -lit
+            for other_lit, clause_idx in bin_watch[false_lit]:
+                other_value = value[other_lit]
+                if other_value == 3:
+                    continue
+                if other_value:
+                    return clauses[clause_idx]
+                # Same writes as assign(), inlined to save a call per implication
+                value[other_lit] = 3
+                value[-other_lit] = 1
+                var = abs(other_lit)
+                level[var] = decision_level
+                reason[var] = clause_idx
+                trail.append(other_lit)
+            
+            # Process all longer clauses watching the negation of this literal
+            ws = watch_list[false_lit]
+            i = 0
+            while i < len(ws):
+                clause_idx, blocker = ws[i]
+                
+                # A true blocker means the clause is satisfied, skip loading it
+                if value[blocker] == 3:
+                    i += 1
+                    continue
+                
+                clause = clauses[clause_idx]
+                if len(clause) == 1:
+                    return clause  # Conflict on a unit clause
+                
+                # Make sure the false literal is at position 1
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                
+                # Clause is already satisfied by the other watch
+                first = clause[0]
+                first_value = value[first]
+                if first_value == 3:
+                    if level[abs(first)] <= inactive_level and len(clause) >= inactive_min_len:
+                        # Stays satisfied until first is unassigned, which also
+                        # unassigns false_lit: drop the watch until then
+                        inactive_watches[first].append(clause_idx)
+                        ws[i] = ws[-1]
+                        ws.pop()
+                    else:
+                        ws[i] = (clause_idx, first)
+                        i += 1
+                    continue
                 
                 # Find a new literal to watch
-                new_watch = None
-                for other_lit in clause:
-                    other_var = abs(other_lit)
-                    if other_lit != neg_lit and other_var not in self.assignment:
-                        new_watch = other_lit
-                        break
-                    elif other_var in self.assignment and self.assignment[other_var] == (other_lit > 0):
-                        new_watch = other_lit  # Clause is already satisfied
+                found_new_watch = False
+                for k in range(2, len(clause)):
+                    other_lit = clause[k]
+                    if value[other_lit] != 1:
+                        clause[1], clause[k] = other_lit, false_lit
+                        watch_list[other_lit].append((clause_idx, first))
+                        ws[i] = ws[-1]
+                        ws.pop()
+                        found_new_watch = True
                         break
+                if found_new_watch:
+                    continue
                 
-                if new_watch is not None:
-                    # Update watch list
-                    self.watch_list[new_watch].append(clause_idx)
-                    to_remove.append((neg_lit, clause_idx))
-                else:
-                    # Clause is unit or conflicting
-                    unassigned = []
-                    satisfied = False
-                    for l in clause:
-                        v = abs(l)
-                        if v not in self.assignment:
-                            unassigned.append(l)
-                        elif self.assignment[v] == (l > 0):
-                            satisfied = True
-                            break
-                    
-                    if satisfied:
-                        continue
-                    elif len(unassigned) == 1:
-                        # Unit clause found
-                        unit_lit = unassigned[0]
-                        unit_var = abs(unit_lit)
-                        if unit_var in self.assignment:
-                            if self.assignment[unit_var] != (unit_lit > 0):
-                                return clause  # Conflict
-                        else:
-                            self.assign(unit_var, unit_lit > 0, clause_idx)
-                    else:
-                        # Conflict found
-                        return clause
-        
-            # Remove processed watches
-            for lit, idx in to_remove:
-                if idx in self.watch_list.get(lit, []):
-                    self.watch_list[lit].remove(idx)
+                # Clause is unit or conflicting
+                if first_value:
+                    return clause  # Conflict
+                value[first] = 3
+                value[-first] = 1
+                var = abs(first)
+                level[var] = decision_level
+                reason[var] = clause_idx
+                trail.append(first)
+                i += 1
         
         return None
 
     def assign(self, var, value, antecedent):
         lit = var if value else -var
-        self.assignment[lit] = True
-        self.var_info[var] = (self.decision_level, antecedent)
+        self.value[lit] = 3
+        self.value[-lit] = 1
+        self.level[var] = self.decision_level
+        self.reason[var] = antecedent
         self.trail.append(lit)
 
     def analyze_conflict(self, conflict_clause):
-        # Implement conflict analysis (1st UIP learning)
-        learned_clause = []
-        backtrack_level = 0
-        seen = set()
-        current_level_lits = []
-        
-        # Start with the conflict clause
-        queue = deque()
-        for lit in conflict_clause:
-            var = abs(lit)
-            queue.append(var)
-            seen.add(var)
+        # 1st UIP learning: resolve backwards along the trail until a single
+        # literal of the current decision level is left
+        seen = self.seen
+        clauses = self.clauses
+        var_level = self.level
+        trail = self.trail
+        decision_level = self.decision_level
+        learned_clause = [0]  # Slot 0 is reserved for the asserting literal
+        counter = 0  # Seen literals of the current level not yet resolved
+        clause = conflict_clause
+        index = len(trail) - 1
+        lit = 0
         
-        while queue:
-            var = queue.popleft()
-            level, antecedent = self.var_info.get(var, (0, None))
+        while True:
+            for l in clause:
+                v = abs(l)
+                if l == lit or seen[v]:
+                    continue
+                level = var_level[v]
+                if level == 0:
+                    continue  # Fixed at the top level, never part of the clause
+                seen[v] = 1
+                if level == decision_level:
+                    counter += 1
+                else:
+                    learned_clause.append(l)
             
-            if level == self.decision_level:
-                current_level_lits.append(var)
-            if antecedent is None:
-                continue  # Decision variable
+            # Next seen literal on the trail
+            while not seen[abs(trail[index])]:
+                index -= 1
+            lit = trail[index]
+            index -= 1
+            seen[abs(lit)] = 0
+            counter -= 1
+            if counter == 0:
+                break  # lit is the 1st UIP
             
             # Resolve with antecedent clause
-            antecedent_clause = self.clauses[antecedent] if antecedent < len(self.clauses) else self.learned_clauses[antecedent - len(self.clauses)]
-            for lit in antecedent_clause:
-                v = abs(lit)
-                if v != var and v not in seen:
-                    seen.add(v)
-                    queue.append(v)
+            clause = clauses[self.reason[abs(lit)]]
         
-        # Find the 1st UIP
-        if current_level_lits:
-            uip = current_level_lits[-1]  # Simplified - should implement proper UIP detection
-            learned_clause = [lit for lit in conflict_clause if abs(lit) != uip]
-            
-            # Compute backtrack level
-            if len(current_level_lits) > 1:
-                backtrack_level = max(self.var_info[v][0] for v in current_level_lits if v != uip)
-            else:
-                backtrack_level = 0
+        learned_clause[0] = -lit
+        for l in learned_clause[1:]:
+            seen[abs(l)] = 0
+        
+        # Backtrack to the second highest level, which is watched at position 1
+        backtrack_level = 0
+        if len(learned_clause) > 1:
+            max_i = max(range(1, len(learned_clause)), key=lambda i: var_level[abs(learned_clause[i])])
+            learned_clause[1], learned_clause[max_i] = learned_clause[max_i], learned_clause[1]
+            backtrack_level = var_level[abs(learned_clause[1])]
         
         return tuple(learned_clause), backtrack_level
 
     def backtrack(self, level):
         # Undo assignments above the backtrack level
-        while self.decision_level > level:
-            self.decision_level -= 1
-            lim = self.trail_lim.pop()
-            while len(self.trail) > lim:
-                lit = self.trail.pop()
-                var = abs(lit)
-                del self.assignment[lit]
-                if var in self.var_info:
-                    del self.var_info[var]
+        if self.decision_level <= level:
+            return
+        trail = self.trail
+        value = self.value
+        reason = self.reason
+        phase = self.phase
+        heap_pos = self.heap_pos
+        clauses = self.clauses
+        watch_list = self.watch_list
+        inactive_watches = self.inactive_watches
+        lim = self.trail_lim[level]
+        del self.trail_lim[level:]
+        self.decision_level = level
+        while len(trail) > lim:
+            lit = trail.pop()
+            var = abs(lit)
+            phase[var] = lit > 0
+            value[lit] = value[-lit] = 0
+            reason[var] = None
+            if inactive_watches[lit]:
+                # Restore the watches parked on position 1 while lit satisfied them
+                for clause_idx in inactive_watches[lit]:
+                    clause = clauses[clause_idx]
+                    watch_list[clause[1]].append((clause_idx, clause[0]))
+                inactive_watches[lit] = []
+            if heap_pos[var] < 0:
+                self.heap_insert(var)
+        self.qhead = min(self.qhead, len(trail))
 
     def select_variable(self):
-        # VSIDS heuristic - select variable with highest activity
-        unassigned = [var for var in self.var_order if var not in self.assignment]
-        if not unassigned:
-            return None
-        
-        # Sort by activity (descending)
-        unassigned.sort(key=lambda v: -self.var_activity[v])
-        return unassigned[0]
+        # VSIDS heuristic - pop the most active variables until an unassigned one
+        while self.order_heap:
+            var = self.heap_pop()
+            if not self.value[var]:
+                return var
+        return None
 
     def bump_activity(self, clause):
         # Increase activity of variables in the learned clause
         for lit in clause:
             var = abs(lit)
-            self.var_activity[var] += 1.0
+            self.var_activity[var] += self.var_inc
+            if self.var_activity[var] > 1e100:
+                # Rescale everything to keep activities in floating point range
+                self.var_activity = [a * 1e-100 for a in self.var_activity]
+                self.var_inc *= 1e-100
+            if self.heap_pos[var] >= 0:
+                self.sift_up(self.heap_pos[var])
+        
+        # Decay all activities by bumping future conflicts harder instead
+        self.var_inc /= self.var_decay
+
+    def heap_insert(self, var):
+        self.heap_pos[var] = len(self.order_heap)
+        self.order_heap.append(var)
+        self.sift_up(len(self.order_heap) - 1)
+
+    def heap_pop(self):
+        heap = self.order_heap
+        top = heap[0]
+        last = heap.pop()
+        self.heap_pos[top] = -1
+        if heap:
+            heap[0] = last
+            self.heap_pos[last] = 0
+            self.sift_down(0)
+        return top
+
+    def sift_up(self, i):
+        heap = self.order_heap
+        var = heap[i]
+        activity = self.var_activity[var]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if self.var_activity[heap[parent]] >= activity:
+                break
+            heap[i] = heap[parent]
+            self.heap_pos[heap[i]] = i
+            i = parent
+        heap[i] = var
+        self.heap_pos[var] = i
+
+    def sift_down(self, i):
+        heap = self.order_heap
+        var = heap[i]
+        activity = self.var_activity[var]
+        size = len(heap)
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and self.var_activity[heap[child + 1]] > self.var_activity[heap[child]]:
+                child += 1
+            if self.var_activity[heap[child]] <= activity:
+                break
+            heap[i] = heap[child]
+            self.heap_pos[heap[i]] = i
+            i = child
+        heap[i] = var
+        self.heap_pos[var] = i
+
+    def exchange_clauses(self):
+        # At level 0: send new short learned clauses to the other workers and
+        # add theirs. Returns False if an imported clause is falsified.
+        _, inboxes, worker_id = self.portfolio
+        for clause in self.clauses[self.last_exported:]:
+            if len(clause) <= self.shared_max_len:
+                for i, inbox in enumerate(inboxes):
+                    if i != worker_id:
+                        inbox.put(tuple(clause))
         
-        # Decay all activities periodically
-        if self.conflict_count % 100 == 0:
-            for var in self.var_activity:
-                self.var_activity[var] *= 0.95
+        inbox = inboxes[worker_id]
+        while True:
+            try:
+                clause = inbox.get_nowait()
+            except queue.Empty:
+                break
+            # Literals false at level 0 stay false, so they are dropped
+            literals = []
+            satisfied = False
+            for lit in clause:
+                if self.value[lit] == 3:
+                    satisfied = True
+                    break
+                if not self.value[lit]:
+                    literals.append(lit)
+            if satisfied:
+                continue
+            if not literals:
+                return False
+            self.add_clause(literals)
+            if len(literals) == 1:
+                self.assign(abs(literals[0]), literals[0] > 0, len(self.clauses) - 1)
+        self.last_exported = len(self.clauses)
+        return True
 
     def add_clause(self, clause):
         # Add a learned clause to the solver
-        self.learned_clauses.append(clause)
-        if len(clause) > 0:
-            first_lit = clause[0]
-            self.watch_list[first_lit].append(len(self.clauses) + len(self.learned_clauses) - 1)
-            if len(clause) > 1:
-                second_lit = clause[1]
-                self.watch_list[second_lit].append(len(self.clauses) + len(self.learned_clauses) - 1)
+        clause = list(clause)
+        self.clauses.append(clause)
+        self.watch_clause(clause, len(self.clauses) - 1)
+
+def run_portfolio_worker(clauses, num_vars, portfolio):
+    # Entry point of one solve_portfolio process
+    solver = CDCLSolver()
+    solver.num_vars = num_vars
+    solver.clauses = clauses
+    solver.num_original = len(clauses)
+    solver.variables = {abs(lit) for clause in clauses for lit in clause}
+    worker_id = portfolio[2]
+    if worker_id:
+        # Worker 0 keeps the default configuration, the others vary it
+        rng = random.Random(worker_id)
+        solver.seed = worker_id
+        solver.restart_unit = rng.choice((50, 100, 200, 400))
+        solver.restart_threshold = solver.restart_unit * luby(0)
+        solver.var_decay = rng.choice((0.85, 0.9, 0.95, 0.99))
+    solver.portfolio = portfolio
+    solver.initialize_data_structures()
+    return solver.cdcl()
 
 def get_dimacs_input():
     print("Enter DIMACS format clauses (type 'done' when finished):")
@@ -271,4 +557,6 @@ if __name__ == "__main__":
     result, elapsed = solver.solve()
     
     print("\nThe formula is", "satisfiable" if result else "unsatisfiable")
+    if solver.cache_hit:
+        print("Answer taken from the result cache, no search was run")
     print(f"Solving time: {elapsed:.4f} seconds")
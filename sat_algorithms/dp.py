@@ -1,41 +1,94 @@
 import time
-from collections import defaultdict
+
+from result_cache import solve_cached
 
 class Solver:
     def __init__(self):
-        self.clauses = []
+        self.clauses = []  # Indexed by clause id, None once a clause is removed
         self.variables = set()
-        self.assignment = {}
-        self.pure_lits = set()
+        self.num_vars = 0
+        # Indexed by variable, or by literal with negative ones wrapping from the end
+        self.assignment = []
+        self.pure_lits = []
+        self.occ = []  # Literal -> ids of clauses it was added to
+        self.pos_count = []  # Live positive occurrences per variable
+        self.neg_count = []  # Live negative occurrences per variable
+        self.unit_queue = []  # Ids of clauses that may have become unit
+        self.has_empty_clause = False
+        self.cache_path = None  # sqlite file of earlier results (e.g. DEFAULT_CACHE_PATH), None to disable
+        self.cache_hit = False  # Whether solve() answered from the cache without searching
 
     def parse_dimacs(self, dimacs_str):
+        clauses = []
         lines = dimacs_str.split('\n')
         for line in lines:
             line = line.strip()
-            if not line or line.startswith('c') or line.startswith('p'):
+            if not line or line.startswith('c'):
+                continue
+            if line.startswith('p'):
+                # p cnf <num_vars> <num_clauses>: size the per-variable arrays
+                self.num_vars = int(line.split()[2])
                 continue
             clause = []
-            for lit in line.split()[:-1]:  # Skip the 0 at end
-                lit = int(lit)
+            for tok in line.split():
+                lit = int(tok)
                 if lit == 0:
-                    continue
+                    break  # End of clause
                 var = abs(lit)
                 self.variables.add(var)
                 clause.append(lit)
             if clause:
-                self.clauses.append(tuple(clause))  # Store as tuple for hashability
+                clauses.append(frozenset(clause))
+        
+        num_vars = max(self.num_vars, max(self.variables, default=0))
+        self.assignment = [None] * (num_vars + 1)
+        self.occ = [[] for _ in range(2 * num_vars + 1)]
+        self.pos_count = [0] * (num_vars + 1)
+        self.neg_count = [0] * (num_vars + 1)
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        clause_idx = len(self.clauses)
+        self.clauses.append(clause)
+        for lit in clause:
+            self.occ[lit].append(clause_idx)
+            self.update_count(lit, 1)
+        if not clause:
+            self.has_empty_clause = True
+        elif len(clause) == 1:
+            self.unit_queue.append(clause_idx)
+
+    def remove_clause(self, clause_idx):
+        for lit in self.clauses[clause_idx]:
+            self.update_count(lit, -1)
+        self.clauses[clause_idx] = None
+
+    def update_count(self, lit, delta):
+        if lit > 0:
+            self.pos_count[lit] += delta
+        else:
+            self.neg_count[-lit] += delta
+
+    def live_clauses(self, lit):
+        # Ids of clauses still containing lit; occurrence lists are pruned lazily
+        return [idx for idx in self.occ[lit] if self.clauses[idx] is not None and lit in self.clauses[idx]]
 
     def solve(self):
         start_time = time.time()
-        
+        live = [clause for clause in self.clauses if clause is not None]
+        result, self.cache_hit = solve_cached(self.cache_path, 'dp', live, self.dp)
+        elapsed = time.time() - start_time
+        return result, elapsed
+    
+    def dp(self):
         while True:
             # 1. Unit propagation
             changed = True
             while changed:
                 changed = self.unit_propagation()
                 if self.contradiction_found():
-                    elapsed = time.time() - start_time
-                    return False, elapsed
+                    return False
             
             # 2. Pure literal elimination
             self.find_pure_literals()
@@ -45,128 +98,115 @@ class Solver:
             
             # 3. Variable elimination
             if not self.variables:
-                elapsed = time.time() - start_time
-                return True, elapsed
+                return True
                 
             var = self.select_variable()
             self.apply_variable_elimination(var)
     
     def unit_propagation(self):
         changed = False
-        new_clauses = []
-        
-        # First pass to find unit clauses
-        unit_clauses = [c[0] for c in self.clauses if len(c) == 1]
         
-        for lit in unit_clauses:
-            var = abs(lit)
-            if var in self.assignment:
-                if (lit > 0 and not self.assignment[var]) or (lit < 0 and self.assignment[var]):
-                    continue  # Contradiction will be caught later
-            else:
-                self.assignment[var] = lit > 0
-                changed = True
-        
-        if not changed:
-            return False
+        while self.unit_queue and not self.has_empty_clause:
+            clause = self.clauses[self.unit_queue.pop()]
+            if clause is None or len(clause) != 1:
+                continue  # Satisfied or already handled
             
-        # Filter satisfied clauses and simplify others
-        for clause in self.clauses:
-            new_clause = []
-            satisfied = False
-            for lit in clause:
-                var = abs(lit)
-                if var in self.assignment:
-                    if (lit > 0 and self.assignment[var]) or (lit < 0 and not self.assignment[var]):
-                        satisfied = True
-                        break
-                else:
-                    new_clause.append(lit)
+            lit = next(iter(clause))
+            var = abs(lit)
+            self.assignment[var] = lit > 0
+            self.variables.discard(var)
+            changed = True
             
-            if not satisfied:
-                new_clauses.append(tuple(new_clause))  # Store as tuple
+            # Only touch the clauses containing the literal: drop the
+            # satisfied ones and shrink the ones containing its negation
+            for idx in self.live_clauses(lit):
+                self.remove_clause(idx)
+            for idx in self.live_clauses(-lit):
+                new_clause = self.clauses[idx] - {-lit}
+                self.clauses[idx] = new_clause
+                self.update_count(-lit, -1)
+                if not new_clause:
+                    self.has_empty_clause = True
+                elif len(new_clause) == 1:
+                    self.unit_queue.append(idx)
+            self.occ[lit] = []
+            self.occ[-lit] = []
         
-        self.clauses = new_clauses
-        return True
+        return changed
     
     def find_pure_literals(self):
-        lit_counts = defaultdict(int)
-        self.pure_lits = set()
-        
-        for clause in self.clauses:
-            for lit in clause:
-                lit_counts[lit] += 1
-        
-        for lit in lit_counts:
-            if -lit not in lit_counts:
-                self.pure_lits.add(lit)
+        self.pure_lits = []
+        for var in self.variables:
+            if self.neg_count[var] == 0:
+                self.pure_lits.append(var)
+            elif self.pos_count[var] == 0:
+                self.pure_lits.append(-var)
     
     def apply_pure_literals(self):
-        new_clauses = []
-        pure_vars = set(abs(lit) for lit in self.pure_lits)
-        
         for lit in self.pure_lits:
             var = abs(lit)
             self.assignment[var] = lit > 0
             self.variables.discard(var)
+            for idx in self.live_clauses(lit):
+                self.remove_clause(idx)
         
-        for clause in self.clauses:
-            keep = True
-            for lit in clause:
-                var = abs(lit)
-                if var in pure_vars:
-                    keep = False
-                    break
-            if keep:
-                new_clauses.append(clause)
-        
-        self.clauses = new_clauses
-        self.pure_lits = set()
+        self.pure_lits = []
     
     def select_variable(self):
         return next(iter(self.variables))
     
     def apply_variable_elimination(self, var):
         # Resolve all clauses containing var with clauses containing -var
-        pos_clauses = [c for c in self.clauses if var in c]
-        neg_clauses = [c for c in self.clauses if -var in c]
+        pos_clauses = [self.clauses[idx] for idx in self.live_clauses(var)]
+        neg_clauses = [self.clauses[idx] for idx in self.live_clauses(-var)]
         
         new_clauses = []
         resolved = set()
         
-        # Generate resolvents
+        # Generate resolvents, skipping tautologies
         for pc in pos_clauses:
+            pc_rest = pc - {var}
             for nc in neg_clauses:
-                resolvent = []
-                seen = set()
-                for lit in pc:
-                    if abs(lit) != var and lit not in seen:
-                        resolvent.append(lit)
-                        seen.add(lit)
-                for lit in nc:
-                    if abs(lit) != var and lit not in seen:
-                        resolvent.append(lit)
-                        seen.add(lit)
-                
-                # Convert to tuple for hashability
-                resolvent_tuple = tuple(sorted(resolvent))
-                if resolvent_tuple not in resolved:
-                    resolved.add(resolvent_tuple)
-                    new_clauses.append(resolvent_tuple)
+                resolvent = pc_rest | (nc - {-var})
+                if any(-lit in resolvent for lit in resolvent):
+                    continue
+                if resolvent not in resolved:
+                    resolved.add(resolvent)
+                    new_clauses.append(resolvent)
         
-        # Add clauses not containing the variable
-        for clause in self.clauses:
-            if var not in clause and -var not in clause:
-                new_clauses.append(clause)
+        # Replace the clauses containing the variable by their resolvents
+        for idx in self.live_clauses(var) + self.live_clauses(-var):
+            if self.clauses[idx] is not None:
+                self.remove_clause(idx)
+        self.occ[var] = []
+        self.occ[-var] = []
+        for clause in new_clauses:
+            self.add_resolvent(clause)
         
-        self.clauses = new_clauses
         self.variables.remove(var)
     
+    def add_resolvent(self, clause):
+        if not clause:
+            self.add_clause(clause)
+            return
+        
+        # Forward subsumption: skip the resolvent if a clause already implies it
+        for lit in clause:
+            for idx in self.live_clauses(lit):
+                if self.clauses[idx] <= clause:
+                    return
+        
+        # Backward subsumption: any clause the resolvent subsumes contains
+        # its least frequent literal, so that occurrence list is enough
+        rarest = min(clause, key=lambda lit: len(self.occ[lit]))
+        for idx in self.live_clauses(rarest):
+            if clause < self.clauses[idx]:
+                self.remove_clause(idx)
+        
+        self.add_clause(clause)
+    
     def contradiction_found(self):
-        for clause in self.clauses:
-            if not clause:
-                return True
-        return False
+        return self.has_empty_clause
 
 def get_dimacs_input():
     print("Enter DIMACS format clauses (type 'done' when finished):")
@@ -186,4 +226,6 @@ if __name__ == "__main__":
     result, elapsed = solver.solve()
     
     print("\nThe formula is", "satisfiable" if result else "unsatisfiable")
+    if solver.cache_hit:
+        print("Answer taken from the result cache, no search was run")
     print(f"Solving time: {elapsed:.4f} seconds")
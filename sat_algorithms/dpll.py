@@ -1,157 +1,178 @@
 import time
-from collections import defaultdict
+
+from result_cache import solve_cached
 
 class DPLLSolver:
     def __init__(self):
         self.clauses = []
         self.variables = set()
-        self.assignment = {}
+        self.num_vars = 0
+        # Truth byte per literal, negative literals wrapping from the end:
+        # bit 0 = assigned, bit 1 = true. So 3 is true, 1 false, 0 unassigned.
+        self.value = bytearray()
         self.unit_clauses = set()
-        self.watch_list = defaultdict(list)
-        self.occurrences = defaultdict(int)
+        self.trail = []  # (literal, tried_both) in assignment order
+        self.qhead = 0  # Index of the next trail literal to propagate
+        # Literal-indexed like value
+        self.watch_list = []
+        self.occurrences = []
+        self.cache_path = None  # sqlite file of earlier results (e.g. DEFAULT_CACHE_PATH), None to disable
+        self.cache_hit = False  # Whether solve() answered from the cache without searching
 
     def parse_dimacs(self, dimacs_str):
         lines = dimacs_str.split('\n')
         for line in lines:
             line = line.strip()
-            if not line or line.startswith('c') or line.startswith('p'):
+            if not line or line.startswith('c'):
+                continue
+            if line.startswith('p'):
+                # p cnf <num_vars> <num_clauses>: size the per-variable arrays
+                self.num_vars = int(line.split()[2])
                 continue
             clause = []
-            for lit in line.split()[:-1]:  # Skip the 0 at end
-                lit = int(lit)
+            for tok in line.split():
+                lit = int(tok)
                 if lit == 0:
-                    continue
+                    break  # End of clause
                 var = abs(lit)
                 self.variables.add(var)
                 clause.append(lit)
             if clause:
-                self.clauses.append(tuple(clause))
+                self.clauses.append(clause)  # Mutable, watched literals live at positions 0 and 1
                 if len(clause) == 1:
                     self.unit_clauses.add(clause[0])
 
     def solve(self):
         start_time = time.time()
+        num_vars = max(self.num_vars, max(self.variables, default=0))
+        self.value = bytearray(2 * num_vars + 1)
+        self.watch_list = [[] for _ in range(2 * num_vars + 1)]
+        self.occurrences = [0] * (2 * num_vars + 1)
         
-        # Initialize watch list
+        # Watch the first two literals of every clause, units are asserted up front
         for i, clause in enumerate(self.clauses):
-            if len(clause) > 0:
-                first_lit = clause[0]
-                self.watch_list[first_lit].append(i)
-                if len(clause) > 1:
-                    second_lit = clause[1]
-                    self.watch_list[second_lit].append(i)
+            if len(clause) > 1:
+                self.watch_list[clause[0]].append(i)
+                self.watch_list[clause[1]].append(i)
         
         # Count literal occurrences
         for clause in self.clauses:
             for lit in clause:
                 self.occurrences[lit] += 1
         
-        result = self.dpll()
+        result, self.cache_hit = solve_cached(self.cache_path, 'dpll', self.clauses, self.dpll)
         elapsed = time.time() - start_time
         return result, elapsed
     
     def dpll(self):
-        # Unit propagation
-        while self.unit_clauses:
-            lit = self.unit_clauses.pop()
-            var = abs(lit)
-            value = lit > 0
-            
-            if var in self.assignment:
-                if self.assignment[var] != value:
-                    return False  # Contradiction
-                continue
-            
-            self.assignment[var] = value
-            
-            # Process all clauses watching this literal
-            to_remove = []
-            for clause_idx in self.watch_list.get(lit, []):
-                clause = self.clauses[clause_idx]
-                new_watch = None
-                for other_lit in clause:
-                    if other_lit != lit:
-                        other_var = abs(other_lit)
-                        if other_var not in self.assignment or \
-                           (self.assignment[other_var] == (other_lit > 0)):
-                            new_watch = other_lit
-                            break
-                
-                if new_watch is None:
-                    # Clause is unit or conflicting
-                    unassigned = []
-                    satisfied = False
-                    for l in clause:
-                        v = abs(l)
-                        if v not in self.assignment:
-                            unassigned.append(l)
-                        elif self.assignment[v] == (l > 0):
-                            satisfied = True
-                            break
-                    
-                    if satisfied:
-                        continue
-                    elif len(unassigned) == 1:
-                        self.unit_clauses.add(unassigned[0])
-                    elif not unassigned:
-                        return False  # Conflict
-            
-            # Remove from watch list
-            if lit in self.watch_list:
-                del self.watch_list[lit]
-            if -lit in self.watch_list:
-                del self.watch_list[-lit]
-        
-        # Pure literal elimination
-        pure_lits = set()
-        for lit in self.occurrences:
-            if -lit not in self.occurrences:
-                pure_lits.add(lit)
-        
-        for lit in pure_lits:
-            var = abs(lit)
-            if var not in self.assignment:
-                self.assignment[var] = (lit > 0)
-        
-        # Check if all clauses are satisfied
-        all_satisfied = True
-        for clause in self.clauses:
-            satisfied = False
-            for lit in clause:
-                var = abs(lit)
-                if var in self.assignment and self.assignment[var] == (lit > 0):
-                    satisfied = True
-                    break
-            if not satisfied:
-                all_satisfied = False
-                break
+        trail = self.trail
         
-        if all_satisfied:
-            return True
+        # Unit clauses hold before any decision
+        for lit in self.unit_clauses:
+            if self.value[lit] == 1:
+                return False  # Contradiction
+            if not self.value[lit]:
+                self.assign(lit, True)
         
-        # Select unassigned variable
-        unassigned = [var for var in self.variables if var not in self.assignment]
-        if not unassigned:
-            return True
-        
-        var = unassigned[0]
+        # Pure literal elimination: a literal whose negation never occurs
+        # can always be made true
+        for var in self.variables:
+            if self.value[var]:
+                continue
+            if not self.occurrences[-var]:
+                self.assign(var, True)
+            elif not self.occurrences[var]:
+                self.assign(-var, True)
         
-        # Try assigning True
-        self.assignment[var] = True
-        result = self.dpll()
-        if result:
-            return True
+        while True:
+            if self.unit_propagation():
+                # Chronological backtracking: undo the trail up to the most
+                # recent decision whose other branch is still open, then flip it
+                while trail:
+                    lit, tried_both = trail.pop()
+                    self.unassign(lit)
+                    if not tried_both:
+                        self.assign(-lit, True)
+                        break
+                else:
+                    return False  # Both branches failed for every decision
+                # Everything below the flipped literal was already propagated
+                self.qhead = len(trail) - 1
+                continue
+            
+            # Select unassigned variable
+            var = self.select_variable()
+            if var is None:
+                return True  # All variables assigned without conflict
+            
+            # Decide var True first; the decision is not flipped yet, so
+            # backtracking will still try -var
+            self.assign(var, tried_both=False)
+    
+    def unit_propagation(self):
+        # Returns True on conflict. Watched literals live at positions 0 and 1
+        value = self.value
+        watch_list = self.watch_list
+        clauses = self.clauses
+        trail = self.trail
         
-        # Backtrack and try False
-        del self.assignment[var]
-        self.assignment[var] = False
-        result = self.dpll()
-        if result:
-            return True
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead][0]
+            self.qhead += 1
+            
+            # Process all clauses watching the literal that just became false
+            ws = watch_list[false_lit]
+            i = 0
+            while i < len(ws):
+                clause_idx = ws[i]
+                clause = clauses[clause_idx]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                
+                # Clause is already satisfied by the other watch
+                first = clause[0]
+                if value[first] == 3:
+                    i += 1
+                    continue
+                
+                # Find a new literal to watch
+                found_new_watch = False
+                for k in range(2, len(clause)):
+                    other_lit = clause[k]
+                    if value[other_lit] != 1:
+                        clause[1], clause[k] = other_lit, false_lit
+                        watch_list[other_lit].append(clause_idx)
+                        ws[i] = ws[-1]
+                        ws.pop()
+                        found_new_watch = True
+                        break
+                if found_new_watch:
+                    continue
+                
+                # Clause is unit or conflicting
+                if value[first]:
+                    return True  # Conflict
+                self.assign(first, True)
+                i += 1
         
-        # Undo assignment if both failed
-        del self.assignment[var]
         return False
+    
+    def select_variable(self):
+        value = self.value
+        for var in self.variables:
+            if not value[var]:
+                return var
+        return None
+
+    def assign(self, lit, tried_both):
+        # Implied literals are pushed as tried_both, only decisions get flipped
+        self.value[lit] = 3
+        self.value[-lit] = 1
+        self.trail.append((lit, tried_both))
+
+    def unassign(self, lit):
+        # Either polarity clears both bytes, no need to recover the variable
+        self.value[lit] = self.value[-lit] = 0
 
 def get_dimacs_input():
     print("Enter DIMACS format clauses (type 'done' when finished):")
@@ -171,4 +192,6 @@ if __name__ == "__main__":
     result, elapsed = solver.solve()
     
     print("\nThe formula is", "satisfiable" if result else "unsatisfiable")
+    if solver.cache_hit:
+        print("Answer taken from the result cache, no search was run")
     print(f"Solving time: {elapsed:.4f} seconds")
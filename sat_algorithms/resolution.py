@@ -1,39 +1,25 @@
 import re
 import time
-from itertools import combinations
-
-class Literal:
-    def __init__(self, name, negated=False):
-        self.name = name
-        self.negated = negated
-    
-    def __eq__(self, other):
-        return self.name == other.name and self.negated == other.negated
-    
-    def __hash__(self):
-        return hash((self.name, self.negated))
-    
-    def __str__(self):
-        return f"¬{self.name}" if self.negated else self.name
-    
-    def __repr__(self):
-        return str(self)
-    
-    def negate(self):
-        return Literal(self.name, not self.negated)
+from collections import defaultdict
 
 class Clause:
+    # No per-instance __dict__, saturation creates a lot of these
+    __slots__ = ('literals', '_hash', '_is_taut')
+
     def __init__(self, literals):
+        # Literals are ints: var for a positive literal, -var for a negated one
         self.literals = frozenset(literals)
+        self._hash = hash(self.literals)  # Clauses are immutable, hash once
+        self._is_taut = None  # Computed on first is_tautology() call
     
     def __eq__(self, other):
-        return self.literals == other.literals
+        return self._hash == other._hash and self.literals == other.literals
     
     def __hash__(self):
-        return hash(self.literals)
+        return self._hash
     
     def __str__(self):
-        return "{" + ", ".join(map(str, self.literals)) + "}"
+        return "{" + ", ".join(f"¬{-lit}" if lit < 0 else str(lit) for lit in sorted(self.literals, key=abs)) + "}"
     
     def __repr__(self):
         return str(self)
@@ -42,23 +28,18 @@ class Clause:
         return len(self.literals) == 0
     
     def is_tautology(self):
-        literals = list(self.literals)
-        for i in range(len(literals)):
-            for j in range(i+1, len(literals)):
-                if literals[i].name == literals[j].name and literals[i].negated != literals[j].negated:
-                    return True
-        return False
+        if self._is_taut is None:
+            self._is_taut = any(-lit in self.literals for lit in self.literals)
+        return self._is_taut
     
     def resolve(self, other):
-        resolvents = set()
-        for l1 in self.literals:
-            for l2 in other.literals:
-                if l1.name == l2.name and l1.negated != l2.negated:
-                    new_literals = (self.literals - {l1}) | (other.literals - {l2})
-                    new_clause = Clause(new_literals)
-                    if not new_clause.is_tautology():
-                        resolvents.add(new_clause)
-        return resolvents
+        # Non-tautological clauses clashing on more than one literal only have
+        # tautological resolvents, so there is at most one worth building
+        clashes = [lit for lit in self.literals if -lit in other.literals]
+        if len(clashes) != 1:
+            return set()
+        lit = clashes[0]
+        return {Clause((self.literals - {lit}) | (other.literals - {-lit}))}
 
 def parse_dimacs(dimacs_str):
     clauses = []
@@ -68,49 +49,60 @@ def parse_dimacs(dimacs_str):
         if not line or line.startswith('c') or line.startswith('p'):
             continue
         literals = []
-        for lit in line.split()[:-1]:  # Skip the 0 at the end
-            lit = int(lit)
+        for tok in line.split():
+            lit = int(tok)
             if lit == 0:
-                continue
-            negated = lit < 0
-            name = str(abs(lit))
-            literals.append(Literal(name, negated))
+                break  # End of clause
+            literals.append(lit)
         if literals:
             clauses.append(Clause(literals))
     return clauses
 
 def parse_custom_format(clauses_str):
+    # Variable names are numbered in order of first appearance
+    var_ids = {}
     clause_strs = re.findall(r'\{[^{}]+\}', clauses_str)
     clauses = []
     for cs in clause_strs:
         cs = re.sub(r'[{} ]', '', cs)
         literals = []
         for lit_str in cs.split(','):
-            if lit_str.startswith('¬'):
-                literals.append(Literal(lit_str[1:], True))
-            else:
-                literals.append(Literal(lit_str, False))
+            negated = lit_str.startswith('¬')
+            name = lit_str[1:] if negated else lit_str
+            var = var_ids.setdefault(name, len(var_ids) + 1)
+            literals.append(-var if negated else var)
         clauses.append(Clause(literals))
     return clauses
 
 def resolution_solver(clauses):
-    clauses = [c for c in clauses if not c.is_tautology()]
-    clauses = set(clauses)
-    new = set()
-    
-    while True:
-        for c1, c2 in combinations(clauses, 2):
-            resolvents = c1.resolve(c2)
-            for r in resolvents:
-                if r.is_empty():
-                    return False  # Unsatisfiable
-                new.add(r)
+    # Set of support: each round only resolves the clauses derived in the
+    # previous round, against each other and against everything kept so far
+    new = {c for c in clauses if not c.is_tautology()}
+    old = set()
+    by_lit = defaultdict(list)  # Literal -> kept clauses containing it
+    
+    while new:
+        for c in new:
+            for lit in c.literals:
+                by_lit[lit].append(c)
+        old |= new
         
-        if new.issubset(clauses):
-            return True  # Satisfiable
+        resolvents = set()
+        done = set()  # New clauses whose pairs with the other new ones are covered
+        for c1 in new:
+            done.add(c1)
+            for lit in c1.literals:
+                for c2 in by_lit[-lit]:
+                    if c2 in done:
+                        continue
+                    for r in c1.resolve(c2):
+                        if r.is_empty():
+                            return False  # Unsatisfiable
+                        resolvents.add(r)
         
-        clauses.update(new)
-        new = set()
+        new = resolvents - old
+    
+    return True  # Satisfiable
 
 def get_input():
     print("Choose input format:")
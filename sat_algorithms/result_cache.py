@@ -0,0 +1,46 @@
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+
+# Caching is opt-in: solvers only use it once their cache_path is set, e.g. to this
+DEFAULT_CACHE_PATH = os.path.expanduser('~/.sat_cache.sqlite')
+
+def clause_set_key(solver_name, clauses):
+    # Canonical form: duplicates dropped, literals sorted in each clause, clauses sorted.
+    # The solver name keeps one solver's answers from being served to another
+    canonical = sorted({tuple(sorted(clause)) for clause in clauses})
+    return hashlib.blake2b(repr((solver_name, canonical)).encode()).digest()
+
+def lookup(cache_path, key):
+    # Stored result for key, None if unknown or the cache can't be read
+    try:
+        with closing(sqlite3.connect(cache_path)) as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, satisfiable INTEGER)')
+            row = conn.execute('SELECT satisfiable FROM results WHERE key = ?', (key,)).fetchone()
+    except sqlite3.Error:
+        return None
+    return None if row is None else bool(row[0])
+
+def store(cache_path, key, result):
+    # A cache that can't be written only costs the next run its shortcut
+    try:
+        with closing(sqlite3.connect(cache_path)) as conn, conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, satisfiable INTEGER)')
+            conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?)', (key, int(result)))
+    except sqlite3.Error:
+        pass
+
+def solve_cached(cache_path, solver_name, clauses, search):
+    # (result, cache hit): run search() unless this solver already solved this
+    # clause set, then remember the answer. On a hit nothing is searched, so
+    # the solver has no model or counters to show for it
+    if not cache_path:
+        return search(), False
+    key = clause_set_key(solver_name, clauses)
+    result = lookup(cache_path, key)
+    if result is not None:
+        return result, True
+    result = search()
+    store(cache_path, key, result)
+    return result, False
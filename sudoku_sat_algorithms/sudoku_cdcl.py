@@ -1,91 +1,114 @@
 import time
 from itertools import combinations
 
+from sudoku_encoding import decode_solution, encode_puzzle, is_valid_solution
+
 class CDCL:
     def __init__(self):
-        self.clauses = set()
+        self.clauses = set()  # Original and learned clauses, never rewritten
         self.variables = set()
         self.assignments = {}  # {var: (value, decision_level, antecedent_clause)}
+        self.trail = []  # Literals made true, in the order they were assigned
         self.decision_level = 0
         self.decision_steps = 0
         self.unit_propagations = 0
         self.learned_clauses = set()
+        self.unit_clauses = set()  # The clauses of size one, asserted first by solve()
+        self.lit_occurs = {}  # Literal -> clauses containing it, built by solve()
+        # Literals that are not false of each clause that is not satisfied.
+        # Every change is logged at the decision level that made it, so that
+        # backtracking puts the clauses back as they were
+        self.open_literals = {}
+        self.clause_log = [[]]  # Per decision level, (clause, its open literals before) pairs
+        self.pending = []  # (literal, antecedent clause) of the unit clauses found but not assigned
         self.variable_order = []  # For VSIDS heuristic
         self.variable_activity = {}  # For VSIDS heuristic
+        self.var_inc = 1.0  # Bump amount, grows instead of decaying every activity
 
     def add_clause(self, clause):
         """Add a clause to the knowledge base"""
-        self.clauses.add(frozenset(clause))
+        clause = frozenset(clause)
+        self.clauses.add(clause)
+        if len(clause) == 1:
+            self.unit_clauses.add(clause)
         for literal in clause:
             var = abs(literal)
             self.variables.add(var)
             if var not in self.variable_activity:
                 self.variable_activity[var] = 0
 
+    def add_at_most_one(self, groups):
+        """Add the clause (-a or -b) for every pair of variables a, b of each group"""
+        # One set update for all the pairs instead of add_clause for each
+        for group in groups:
+            self.variables.update(group)
+            for var in group:
+                self.variable_activity.setdefault(var, 0)
+        self.clauses.update(frozenset((-a, -b)) for group in groups for a, b in combinations(group, 2))
+
+    def copy(self):
+        """New solver with the same clauses, for solvers that have not started"""
+        other = CDCL()
+        other.clauses = set(self.clauses)
+        other.variables = set(self.variables)
+        other.unit_clauses = set(self.unit_clauses)
+        other.variable_activity = dict(self.variable_activity)
+        return other
+
     def bump_variable_activity(self, var):
         """Increase activity for a variable (VSIDS heuristic)"""
-        self.variable_activity[var] += 1
+        self.variable_activity[var] += self.var_inc
 
     def decay_variable_activities(self):
         """Decay all variable activities (VSIDS heuristic)"""
-        for var in self.variable_activity:
-            self.variable_activity[var] *= 0.95
+        # Bumping later conflicts harder keeps the same relative order
+        self.var_inc /= 0.95
+        if self.var_inc > 1e100:
+            # Rescale everything to keep activities in floating point range
+            for var in self.variable_activity:
+                self.variable_activity[var] *= 1e-100
+            self.var_inc *= 1e-100
+
+    def assign(self, literal, antecedent):
+        """Make a literal true and update the open clauses, returning the clause it falsifies if any"""
+        var = abs(literal)
+        self.assignments[var] = (literal > 0, self.decision_level, antecedent)
+        self.trail.append(literal)
+        
+        # Only the clauses containing the variable change, and each change
+        # is logged before it is made
+        open_literals = self.open_literals
+        log = self.clause_log[self.decision_level]
+        for clause in self.lit_occurs.get(literal, ()):
+            if clause in open_literals:
+                log.append((clause, open_literals.pop(clause)))  # Satisfied
+        for clause in self.lit_occurs.get(-literal, ()):
+            literals = open_literals.get(clause)
+            if literals is None:
+                continue  # Already satisfied
+            log.append((clause, literals))
+            literals = literals - {-literal}
+            open_literals[clause] = literals
+            if not literals:
+                return clause  # Every literal is false - conflict
+            if len(literals) == 1:
+                self.pending.append((next(iter(literals)), clause))
+        return None
 
     def unit_propagate(self):
         """Perform unit propagation until no more unit clauses exist"""
-        changed = True
-        while changed:
-            changed = False
-            unit_clauses = [c for c in self.clauses.union(self.learned_clauses) if len(c) == 1]
+        while self.pending:
+            literal, clause = self.pending.pop()
+            var = abs(literal)
+            if var in self.assignments:
+                if self.assignments[var][0] != (literal > 0):
+                    return (False, clause)  # Conflict detected
+                continue
             
-            for clause in unit_clauses:
-                self.unit_propagations += 1
-                literal = next(iter(clause))
-                var = abs(literal)
-                value = literal > 0
-                
-                # Skip if already assigned
-                if var in self.assignments:
-                    if self.assignments[var][0] != value:
-                        # Conflict detected
-                        return (False, clause)
-                    continue
-                
-                # Add the assignment with current decision level and antecedent clause
-                self.assignments[var] = (value, self.decision_level, clause)
-                
-                # Bump activity for variables in the clause
-                for lit in clause:
-                    self.bump_variable_activity(abs(lit))
-                
-                # Remove all clauses containing this literal (they're satisfied)
-                self.clauses = {c for c in self.clauses if literal not in c}
-                self.learned_clauses = {c for c in self.learned_clauses if literal not in c}
-                
-                # Remove negations of this literal from all clauses
-                new_clauses = set()
-                for c in self.clauses:
-                    if -literal in c:
-                        new_clause = c - {-literal}
-                        if not new_clause:  # Empty clause found - conflict
-                            return (False, c)
-                        new_clauses.add(new_clause)
-                    else:
-                        new_clauses.add(c)
-                self.clauses = new_clauses
-                
-                new_learned = set()
-                for c in self.learned_clauses:
-                    if -literal in c:
-                        new_clause = c - {-literal}
-                        if not new_clause:  # Empty clause found - conflict
-                            return (False, c)
-                        new_learned.add(new_clause)
-                    else:
-                        new_learned.add(c)
-                self.learned_clauses = new_learned
-                
-                changed = True
+            self.unit_propagations += 1
+            conflict_clause = self.assign(literal, clause)
+            if conflict_clause is not None:
+                return (False, conflict_clause)
         
         return (True, None)
 
@@ -94,49 +117,60 @@ class CDCL:
         if self.decision_level == 0:
             return None  # Top-level conflict
         
-        # Get all variables in the conflict clause that were assigned at current decision level
-        current_level_vars = []
-        for literal in conflict_clause:
-            var = abs(literal)
-            if var in self.assignments and self.assignments[var][1] == self.decision_level:
-                current_level_vars.append(var)
-        
-        # If only one variable at current level, we can backtrack further
-        while len(current_level_vars) == 1:
-            var = current_level_vars[0]
-            antecedent = self.assignments[var][2]
-            if antecedent is None:  # Decision variable
-                break
-            
-            # Resolve the conflict clause with the antecedent
-            new_conflict = (conflict_clause - {-var}).union(antecedent - {var})
-            conflict_clause = new_conflict
-            
-            # Find new current level variables
-            current_level_vars = []
-            for literal in conflict_clause:
+        # Resolve the conflict clause with the antecedents of its current
+        # level literals, latest first, until only one of them is left (the
+        # first unique implication point). Level 0 literals are always false
+        # and are left out
+        learned_literals = set()
+        seen = set()
+        current_level_count = 0
+        index = len(self.trail) - 1
+        clause = conflict_clause
+        while True:
+            for literal in clause:
                 var = abs(literal)
-                if var in self.assignments and self.assignments[var][1] == self.decision_level:
-                    current_level_vars.append(var)
+                if var in seen:
+                    continue
+                seen.add(var)
+                self.bump_variable_activity(var)
+                level = self.assignments[var][1]
+                if level == self.decision_level:
+                    current_level_count += 1
+                elif level > 0:
+                    learned_literals.add(literal)
+            
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            current_level_count -= 1
+            if current_level_count == 0:
+                break
+            clause = self.assignments[abs(literal)][2]
         
-        # Create the learned clause
-        learned_clause = frozenset(conflict_clause)
+        # Backtrack to the highest level among the other literals, where the
+        # learned clause forces -literal
+        backtrack_level = max((self.assignments[abs(other)][1] for other in learned_literals), default=0)
+        learned_literals.add(-literal)
+        return (frozenset(learned_literals), backtrack_level)
+
+    def learn_clause(self, learned_clause):
+        """Add a learned clause after backtracking, queueing its only open literal"""
         self.learned_clauses.add(learned_clause)
-        
-        # Find the backtrack level (second highest decision level in the learned clause)
-        decision_levels = []
+        self.clauses.add(learned_clause)
         for literal in learned_clause:
-            var = abs(literal)
-            if var in self.assignments:
-                decision_levels.append(self.assignments[var][1])
-        
-        if len(decision_levels) > 1:
-            decision_levels.sort(reverse=True)
-            backtrack_level = decision_levels[1]
-        else:
-            backtrack_level = 0
+            self.lit_occurs.setdefault(literal, []).append(learned_clause)
         
-        return (learned_clause, backtrack_level)
+        # Its false literals are logged at their own levels, as if the
+        # clause had been there when they were assigned
+        literals = learned_clause
+        false_literals = sorted((literal for literal in learned_clause if abs(literal) in self.assignments),
+                                key=lambda literal: self.assignments[abs(literal)][1])
+        for literal in false_literals:
+            self.clause_log[self.assignments[abs(literal)][1]].append((learned_clause, literals))
+            literals = literals - {literal}
+        self.open_literals[learned_clause] = literals
+        self.pending.append((next(iter(literals)), learned_clause))
 
     def choose_literal(self):
         """Select an unassigned variable using VSIDS heuristic"""
@@ -150,134 +184,70 @@ class CDCL:
 
     def solve(self):
         """Execute the CDCL algorithm"""
-        # Initial unit propagation
-        result, conflict_clause = self.unit_propagate()
-        if not result:
+        if frozenset() in self.clauses:
             return False
-        
-        # If all clauses are satisfied, we're done
-        if not self.clauses and not any(len(c) > 0 for c in self.learned_clauses):
-            return True
+        for clause in self.clauses:
+            for literal in clause:
+                self.lit_occurs.setdefault(literal, []).append(clause)
+        self.open_literals = {clause: clause for clause in self.clauses}
+        self.pending = [(next(iter(clause)), clause) for clause in self.unit_clauses]
         
         while True:
-            # Choose a literal to branch on
-            var = self.choose_literal()
-            if var is None:
-                return True  # All variables assigned
-            
-            self.decision_steps += 1
-            self.decision_level += 1
-            
-            # Try assigning the literal to True first
-            self.assignments[var] = (True, self.decision_level, None)
-            
-            while True:
-                result, conflict_clause = self.unit_propagate()
-                if result:
-                    break  # No conflict
-                
-                # Analyze conflict and learn clause
-                analysis_result = self.analyze_conflict(conflict_clause)
-                if analysis_result is None:
-                    return False  # Unsatisfiable
-                
-                learned_clause, backtrack_level = analysis_result
+            result, conflict_clause = self.unit_propagate()
+            if result:
+                # If all clauses are satisfied, we're done
+                if not self.open_literals:
+                    return True
                 
-                # Backtrack to the appropriate level
-                self.backtrack(backtrack_level)
-                self.decision_level = backtrack_level
+                # Choose a literal to branch on
+                var = self.choose_literal()
+                if var is None:
+                    return True  # All variables assigned
                 
-                if self.decision_level == 0:
-                    # We've backtracked all the way to the top
-                    self.learned_clauses.add(learned_clause)
+                self.decision_steps += 1
+                self.decision_level += 1
+                self.clause_log.append([])
                 
-                # Add the learned clause and propagate
-                self.clauses.add(learned_clause)
-                self.decay_variable_activities()
-                
-                # The learned clause should now be unit, forcing the next assignment
-                result, _ = self.unit_propagate()
-                if not result:
-                    continue  # Another conflict, repeat analysis
+                # Try assigning the literal to True first
+                conflict_clause = self.assign(var, None)
+                if conflict_clause is None:
+                    continue
+            
+            # Analyze conflict and learn clause
+            analysis_result = self.analyze_conflict(conflict_clause)
+            if analysis_result is None:
+                return False  # Unsatisfiable
             
-            # If we get here, the current assignments are consistent
-            # Continue with next decision if needed
+            # Backtrack to where the learned clause is unit, which forces the next assignment
+            learned_clause, backtrack_level = analysis_result
+            self.backtrack(backtrack_level)
+            self.learn_clause(learned_clause)
+            self.decay_variable_activities()
 
     def backtrack(self, backtrack_level):
         """Backtrack to the specified decision level"""
-        to_remove = []
-        for var, (value, level, _) in self.assignments.items():
-            if level > backtrack_level:
-                to_remove.append(var)
+        # Undo the clause changes of the levels above, latest first
+        while self.decision_level > backtrack_level:
+            for clause, literals in reversed(self.clause_log.pop()):
+                self.open_literals[clause] = literals
+            self.decision_level -= 1
         
-        for var in to_remove:
-            del self.assignments[var]
+        while self.trail and self.assignments[abs(self.trail[-1])][1] > backtrack_level:
+            del self.assignments[abs(self.trail.pop())]
+        self.pending.clear()
 
     def get_stats(self):
         return {
             "decision_steps": self.decision_steps,
             "unit_propagations": self.unit_propagations,
-            "clauses": len(self.clauses),
+            "clauses": len(self.open_literals),
             "learned_clauses": len(self.learned_clauses),
             "assignments": len(self.assignments)
         }
 
 def encode_sudoku(sudoku_grid):
     """Encode a Sudoku puzzle as propositional clauses for CDCL"""
-    n = len(sudoku_grid)
-    sqrt_n = int(n ** 0.5)
-    cdcl = CDCL()
-    
-    # Each cell contains at least one number (1..n)
-    for row in range(n):
-        for col in range(n):
-            clause = [row * n * n + col * n + num + 1 for num in range(n)]
-            cdcl.add_clause(clause)
-    
-    # Each cell contains at most one number
-    for row in range(n):
-        for col in range(n):
-            for num1, num2 in combinations(range(n), 2):
-                cdcl.add_clause([-(row * n * n + col * n + num1 + 1), 
-                               -(row * n * n + col * n + num2 + 1)])
-    
-    # Each number appears at most once in each row
-    for row in range(n):
-        for num in range(n):
-            for col1, col2 in combinations(range(n), 2):
-                cdcl.add_clause([-(row * n * n + col1 * n + num + 1), 
-                               -(row * n * n + col2 * n + num + 1)])
-    
-    # Each number appears at most once in each column
-    for col in range(n):
-        for num in range(n):
-            for row1, row2 in combinations(range(n), 2):
-                cdcl.add_clause([-(row1 * n * n + col * n + num + 1), 
-                                -(row2 * n * n + col * n + num + 1)])
-    
-    # Each number appears at most once in each subgrid
-    for subgrid_row in range(sqrt_n):
-        for subgrid_col in range(sqrt_n):
-            for num in range(n):
-                cells = []
-                for i in range(sqrt_n):
-                    for j in range(sqrt_n):
-                        row = subgrid_row * sqrt_n + i
-                        col = subgrid_col * sqrt_n + j
-                        cells.append((row, col))
-                
-                for (r1, c1), (r2, c2) in combinations(cells, 2):
-                    cdcl.add_clause([-(r1 * n * n + c1 * n + num + 1), 
-                                    -(r2 * n * n + c2 * n + num + 1)])
-    
-    # Add pre-filled cells as unit clauses
-    for row in range(n):
-        for col in range(n):
-            if sudoku_grid[row][col] != 0:
-                num = sudoku_grid[row][col] - 1
-                cdcl.add_clause([row * n * n + col * n + num + 1])
-    
-    return cdcl
+    return encode_puzzle(CDCL, sudoku_grid)
 
 def solve_sudoku_cdcl(sudoku_grid):
     """Solve a Sudoku puzzle using the CDCL algorithm"""
@@ -290,16 +260,11 @@ def solve_sudoku_cdcl(sudoku_grid):
     stats['time'] = end_time - start_time
     
     if result:
-        # Reconstruct the solution from the assignments
-        n = len(sudoku_grid)
-        solution = [[0 for _ in range(n)] for _ in range(n)]
-        for var, (value, _, _) in cdcl.assignments.items():
-            if value:  # Only consider true assignments
-                var_idx = var - 1
-                num = var_idx % n + 1
-                col = (var_idx // n) % n
-                row = var_idx // (n * n)
-                solution[row][col] = num
+        # Reconstruct the solution from the variables assigned True
+        true_vars = (var for var, (value, _, _) in cdcl.assignments.items() if value)
+        solution = decode_solution(true_vars, len(sudoku_grid))
+        if not is_valid_solution(solution, sudoku_grid):
+            raise RuntimeError("CDCL returned a grid that breaks the Sudoku rules")
         return solution, stats
     else:
         return None, stats
@@ -307,24 +272,26 @@ def solve_sudoku_cdcl(sudoku_grid):
 # Example usage:
 if __name__ == "__main__":
     # 9x9 Sudoku example (0 represents empty cells)
-    sudoku_9x9 =   [
-    [8, 0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 3, 6, 0, 0, 0, 0, 0],
-    [0, 7, 0, 0, 9, 0, 2, 0, 0],
-    [0, 5, 0, 0, 0, 7, 0, 0, 0],
-    [0, 0, 0, 0, 4, 5, 7, 0, 0],
-    [0, 0, 0, 1, 0, 0, 0, 3, 0],
-    [0, 0, 1, 0, 0, 0, 0, 6, 8],
-    [0, 0, 8, 5, 0, 0, 0, 1, 0],
-    [0, 9, 0, 0, 0, 0, 4, 0, 0]
-]   
-   print("Solving 9x9 Sudoku with CDCL...")
+    sudoku_9x9 = [
+        [8, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 3, 6, 0, 0, 0, 0, 0],
+        [0, 7, 0, 0, 9, 0, 2, 0, 0],
+        [0, 5, 0, 0, 0, 7, 0, 0, 0],
+        [0, 0, 0, 0, 4, 5, 7, 0, 0],
+        [0, 0, 0, 1, 0, 0, 0, 3, 0],
+        [0, 0, 1, 0, 0, 0, 0, 6, 8],
+        [0, 0, 8, 5, 0, 0, 0, 1, 0],
+        [0, 9, 0, 0, 0, 0, 4, 0, 0]
+    ]
+    
+    print("Solving 9x9 Sudoku with CDCL...")
     solution, stats = solve_sudoku_cdcl(sudoku_9x9)
     
     if solution:
         print("Solution found:")
         for row in solution:
             print(row)
+        print(f"Valid solution: {is_valid_solution(solution, sudoku_9x9)}")
     else:
         print("No solution exists")
     
@@ -1,150 +1,303 @@
 import time
+from array import array
+from collections import deque
 from itertools import combinations
-from copy import deepcopy
+
+from sudoku_encoding import decode_solution, encode_puzzle
 
 class DavisPutnam:
     def __init__(self):
-        self.clauses = set()
+        # Literals of all clauses back to back, clause i spans
+        # offsets[i]:offsets[i + 1] with its two watched literals first
+        self.literals = array('i')
+        self.offsets = array('i', [0])
+        self.watches = {}  # Literal -> ids of the clauses watching it
+        # Per clause (positive, negative, clause id): bit v of the two variable
+        # bitsets is set when v, respectively -v, occurs in the clause
+        self.clause_masks = []
+        self.clause_keys = set()  # Sorted literal tuples of the clauses added so far
+        self.unit_literals = []  # Literals of unit clauses not asserted yet
+        self.prop_queue = deque()  # Assigned literals whose watches are still to be visited
         self.variables = set()
-        self.assignments = {}
+        self.variable_mask = 0  # Bit v is set when variable v occurs in some clause
+        # Truth of each literal once solve() has sized it: 3 for true, 1 for
+        # false, 0 for unassigned, with -literal indexing from the end
+        self.value = bytearray()
+        self.trail = []  # Assigned literals in order, undone on backtrack
+        self.trail_marks = []  # Trail length before each splitting decision
+        self.phase = bytearray()  # Last polarity of each variable, 1 for true, tried first
+        # (assigned variable bitset, open clause bitset) of the residual
+        # formulas shown unsatisfiable, oldest first
+        self.unsat_cache = {}
+        self.unsat_cache_size = 10000
         self.stats = {
             "splitting_steps": 0,
             "unit_propagations": 0,
             "pure_eliminations": 0,
+            "unsat_cache_hits": 0,
             "clauses": 0,
             "time": 0
         }
 
     def add_clause(self, clause):
         """Add a clause to the knowledge base"""
-        self.clauses.add(frozenset(clause))
-        for literal in clause:
+        literals = list(dict.fromkeys(clause))
+        key = tuple(sorted(literals))
+        if key in self.clause_keys:
+            return  # Already added
+        self.clause_keys.add(key)
+        clause_id = len(self.offsets) - 1
+        self.literals.extend(literals)
+        self.offsets.append(len(self.literals))
+        pos_mask = neg_mask = 0
+        for literal in literals:
             self.variables.add(abs(literal))
+            if literal > 0:
+                pos_mask |= 1 << literal
+            else:
+                neg_mask |= 1 << -literal
+        self.clause_masks.append((pos_mask, neg_mask, clause_id))
+        self.variable_mask |= pos_mask | neg_mask
+        
+        if len(literals) == 1:
+            self.unit_literals.append(literals[0])
+        else:
+            for literal in literals[:2]:
+                self.watches.setdefault(literal, []).append(clause_id)
+
+    def add_at_most_one(self, groups):
+        """Add the clause (-a or -b) for every pair of variables a, b of each group"""
+        # Same as add_clause([-a, -b]) without the per clause generic work
+        all_literals = self.literals
+        offsets = self.offsets
+        clause_masks = self.clause_masks
+        clause_keys = self.clause_keys
+        watches = self.watches
+        for group in groups:
+            self.variables.update(group)
+            for var in group:
+                self.variable_mask |= 1 << var
+            for a, b in combinations(group, 2):
+                key = (-a, -b) if a > b else (-b, -a)
+                if key in clause_keys:
+                    continue  # Groups can overlap, e.g. a row and a subgrid
+                clause_keys.add(key)
+                clause_id = len(offsets) - 1
+                all_literals.append(-a)
+                all_literals.append(-b)
+                offsets.append(len(all_literals))
+                clause_masks.append((0, (1 << a) | (1 << b), clause_id))
+                watches.setdefault(-a, []).append(clause_id)
+                watches.setdefault(-b, []).append(clause_id)
+
+    def copy(self):
+        """New solver with the same clauses, for solvers that have not started"""
+        other = DavisPutnam()
+        other.literals = self.literals[:]
+        other.offsets = self.offsets[:]
+        other.watches = {literal: clause_ids[:] for literal, clause_ids in self.watches.items()}
+        other.clause_masks = self.clause_masks[:]
+        other.clause_keys = set(self.clause_keys)
+        other.unit_literals = self.unit_literals[:]
+        other.variables = set(self.variables)
+        other.variable_mask = self.variable_mask
+        return other
+
+    def assignment_masks(self):
+        """Bitsets of the variables currently assigned True and False"""
+        true_mask = false_mask = 0
+        for literal in self.trail:
+            if literal > 0:
+                true_mask |= 1 << literal
+            else:
+                false_mask |= 1 << -literal
+        return true_mask, false_mask
+
+    def open_clause_masks(self, clause_masks):
+        """Masks of the given clauses not satisfied by the current assignments"""
+        true_mask, false_mask = self.assignment_masks()
+        return [masks for masks in clause_masks if not (masks[0] & true_mask or masks[1] & false_mask)]
+
+    def clause_bits(self, clause_masks):
+        """Bitset of the ids of the given clauses"""
+        # Set the bits in a byte buffer, or-ing into a big int copies it every time
+        clause_bytes = bytearray((len(self.clause_masks) + 7) >> 3)
+        for masks in clause_masks:
+            clause_id = masks[2]
+            clause_bytes[clause_id >> 3] |= 1 << (clause_id & 7)
+        return int.from_bytes(clause_bytes, 'little')
+
+    def enqueue(self, literal):
+        """Make a literal true and queue it for propagation, False if it is already false"""
+        value = self.value
+        if value[literal]:
+            return value[literal] == 3
+        value[literal] = 3
+        value[-literal] = 1
+        self.trail.append(literal)
+        self.prop_queue.append(literal)
+        return True
+
+    def undo_to_mark(self):
+        """Unassign everything assigned since the last splitting decision"""
+        mark = self.trail_marks.pop()
+        value = self.value
+        while len(self.trail) > mark:
+            literal = self.trail.pop()
+            self.phase[abs(literal)] = literal > 0
+            value[literal] = value[-literal] = 0
+        self.prop_queue.clear()
 
     def unit_propagate(self):
         """Perform unit propagation until no more unit clauses exist"""
-        changed = True
-        while changed:
-            changed = False
-            unit_clauses = [c for c in self.clauses if len(c) == 1]
-            
-            for clause in unit_clauses:
-                self.stats["unit_propagations"] += 1
-                literal = next(iter(clause))
-                var = abs(literal)
-                value = literal > 0
+        while self.unit_literals:
+            self.stats["unit_propagations"] += 1
+            if not self.enqueue(self.unit_literals.pop()):
+                return False  # Conflict
+        
+        # Only the clauses watching a literal that just became false can turn
+        # unit. The loop runs once per visited watch, so no attribute lookups
+        # or method calls in here
+        value = self.value
+        all_literals = self.literals
+        offsets = self.offsets
+        watches = self.watches
+        trail = self.trail
+        prop_queue = self.prop_queue
+        stats = self.stats
+        while prop_queue:
+            false_lit = -prop_queue.popleft()
+            watchers = watches.get(false_lit, [])
+            i = 0
+            while i < len(watchers):
+                clause_id = watchers[i]
+                start = offsets[clause_id]
+                first = all_literals[start]
+                if first == false_lit:
+                    first = all_literals[start] = all_literals[start + 1]
+                    all_literals[start + 1] = false_lit
                 
-                # Skip if already assigned
-                if var in self.assignments:
-                    if self.assignments[var] != value:
-                        return False  # Conflict
+                # Satisfied by the other watch
+                first_value = value[first]
+                if first_value == 3:
+                    i += 1
                     continue
                 
-                # Assign the variable
-                self.assignments[var] = value
-                
-                # Remove all clauses containing this literal (they're satisfied)
-                self.clauses = {c for c in self.clauses if literal not in c}
-                
-                # Remove negations of this literal from all clauses
-                new_clauses = set()
-                for c in self.clauses:
-                    if -literal in c:
-                        new_clause = c - {-literal}
-                        if not new_clause:  # Empty clause found - conflict
-                            return False
-                        new_clauses.add(new_clause)
-                    else:
-                        new_clauses.add(c)
-                self.clauses = new_clauses
-                
-                changed = True
+                # Move the watch to a literal that is not false
+                for k in range(start + 2, offsets[clause_id + 1]):
+                    literal = all_literals[k]
+                    if value[literal] != 1:
+                        all_literals[start + 1], all_literals[k] = literal, false_lit
+                        watches.setdefault(literal, []).append(clause_id)
+                        watchers[i] = watchers[-1]
+                        watchers.pop()
+                        break
+                else:
+                    # Every other literal is false: the clause is unit or conflicting
+                    if first_value:
+                        prop_queue.clear()
+                        return False  # Conflict
+                    stats["unit_propagations"] += 1
+                    value[first] = 3  # Same as enqueue(first)
+                    value[-first] = 1
+                    trail.append(first)
+                    prop_queue.append(first)
+                    i += 1
         
         return True
 
-    def pure_literal_elimination(self):
+    def pure_literal_elimination(self, open_masks):
         """Eliminate pure literals from the formula"""
-        literal_counts = {}
-        for clause in self.clauses:
-            for literal in clause:
-                if literal in literal_counts:
-                    literal_counts[literal] += 1
-                else:
-                    literal_counts[literal] = 1
+        # OR together the literals of the open clauses, whole words at a time
+        pos_mask = neg_mask = 0
+        for pos, neg, _ in open_masks:
+            pos_mask |= pos
+            neg_mask |= neg
         
+        # An unassigned variable occurring with one sign only is pure
+        true_mask, false_mask = self.assignment_masks()
+        unassigned = ~(true_mask | false_mask)
         pure_literals = []
-        for literal in literal_counts:
-            if -literal not in literal_counts:
-                pure_literals.append(literal)
+        for mask, sign in ((pos_mask & ~neg_mask & unassigned, 1), (neg_mask & ~pos_mask & unassigned, -1)):
+            while mask:
+                low_bit = mask & -mask
+                pure_literals.append(sign * (low_bit.bit_length() - 1))
+                mask ^= low_bit
         
         for literal in pure_literals:
             self.stats["pure_eliminations"] += 1
-            var = abs(literal)
-            value = literal > 0
-            
-            # Assign the pure literal
-            if var not in self.assignments:
-                self.assignments[var] = value
             
-            # Remove all clauses containing this literal
-            self.clauses = {c for c in self.clauses if literal not in c}
+            # Assign the pure literal, the clauses containing it are now satisfied
+            self.enqueue(literal)
 
-    def choose_variable(self):
+    def choose_variable(self, assigned_mask):
         """Select an unassigned variable for splitting"""
-        assigned_vars = set(self.assignments.keys())
-        unassigned = [var for var in self.variables if var not in assigned_vars]
+        # Simple heuristic - choose the lowest unassigned variable
+        unassigned = self.variable_mask & ~assigned_mask
         if not unassigned:
             return None
-        return unassigned[0]  # Simple heuristic - choose first unassigned
+        return (unassigned & -unassigned).bit_length() - 1
 
     def solve(self):
         """Execute the Davis-Putnam algorithm"""
         start_time = time.time()
-        
-        # Initial unit propagation and pure literal elimination
+        num_vars = max(self.variables, default=0)
+        self.value = bytearray(2 * num_vars + 1)
+        self.phase = bytearray(b'\x01') * (num_vars + 1)  # Start from True
+        result = self.search(self.clause_masks)
+        self.stats["time"] = time.time() - start_time
+        self.stats["clauses"] = len(self.open_clause_masks(self.clause_masks))
+        return result
+
+    def search(self, open_masks):
+        """Split on variables, undoing failed branches from the trail"""
         if not self.unit_propagate():
-            self.stats["time"] = time.time() - start_time
-            self.stats["clauses"] = len(self.clauses)
             return False
         
-        self.pure_literal_elimination()
+        # A clause satisfied here stays satisfied in both branches below, so
+        # each level only filters the open clauses of the level above
+        open_masks = self.open_clause_masks(open_masks)
+        
+        # Pure literals are propagated right away so that every literal on
+        # the trail before a splitting mark has been fully processed
+        self.pure_literal_elimination(open_masks)
+        if not self.unit_propagate():
+            return False
         
         # If all clauses are satisfied, we're done
-        if not self.clauses:
-            self.stats["time"] = time.time() - start_time
-            self.stats["clauses"] = len(self.clauses)
+        open_masks = self.open_clause_masks(open_masks)
+        if not open_masks:
             return True
         
+        # What is left to solve only depends on which clauses are open and
+        # which variables are unassigned, however the search got here. The
+        # two bitsets name both exactly, so equal keys are equal subproblems
+        true_mask, false_mask = self.assignment_masks()
+        assigned_mask = true_mask | false_mask
+        residual = (assigned_mask, self.clause_bits(open_masks))
+        if residual in self.unsat_cache:
+            self.stats["unsat_cache_hits"] += 1
+            return False
+        
         # Choose a variable to split on
-        var = self.choose_variable()
+        var = self.choose_variable(assigned_mask)
         if var is None:
-            self.stats["time"] = time.time() - start_time
-            self.stats["clauses"] = len(self.clauses)
             return True
         
         self.stats["splitting_steps"] += 1
         
-        # Try assigning the variable to True
-        solver_true = deepcopy(self)
-        solver_true.clauses.add(frozenset([var]))
-        if solver_true.solve():
-            self.clauses = solver_true.clauses
-            self.assignments = solver_true.assignments
-            self.stats = solver_true.stats
-            self.stats["time"] = time.time() - start_time
-            return True
-        
-        # Try assigning the variable to False
-        solver_false = deepcopy(self)
-        solver_false.clauses.add(frozenset([-var]))
-        if solver_false.solve():
-            self.clauses = solver_false.clauses
-            self.assignments = solver_false.assignments
-            self.stats = solver_false.stats
-            self.stats["time"] = time.time() - start_time
-            return True
+        # Try the polarity the variable last had first (phase saving)
+        literal = var if self.phase[var] else -var
+        for literal in (literal, -literal):
+            self.trail_marks.append(len(self.trail))
+            self.enqueue(literal)
+            if self.search(open_masks):
+                return True
+            self.undo_to_mark()
         
-        self.stats["time"] = time.time() - start_time
+        if len(self.unsat_cache) >= self.unsat_cache_size:
+            del self.unsat_cache[next(iter(self.unsat_cache))]
+        self.unsat_cache[residual] = None
         return False
 
     def get_stats(self):
@@ -152,60 +305,7 @@ class DavisPutnam:
 
 def encode_sudoku(sudoku_grid):
     """Encode a Sudoku puzzle as propositional clauses for Davis-Putnam"""
-    n = len(sudoku_grid)
-    sqrt_n = int(n ** 0.5)
-    solver = DavisPutnam()
-    
-    # Each cell contains at least one number (1..n)
-    for row in range(n):
-        for col in range(n):
-            clause = [row * n * n + col * n + num + 1 for num in range(n)]
-            solver.add_clause(clause)
-    
-    # Each cell contains at most one number
-    for row in range(n):
-        for col in range(n):
-            for num1, num2 in combinations(range(n), 2):
-                solver.add_clause([-(row * n * n + col * n + num1 + 1), 
-                                 -(row * n * n + col * n + num2 + 1)])
-    
-    # Each number appears at most once in each row
-    for row in range(n):
-        for num in range(n):
-            for col1, col2 in combinations(range(n), 2):
-                solver.add_clause([-(row * n * n + col1 * n + num + 1), 
-                                 -(row * n * n + col2 * n + num + 1)])
-    
-    # Each number appears at most once in each column
-    for col in range(n):
-        for num in range(n):
-            for row1, row2 in combinations(range(n), 2):
-                solver.add_clause([-(row1 * n * n + col * n + num + 1), 
-                                  -(row2 * n * n + col * n + num + 1)])
-    
-    # Each number appears at most once in each subgrid
-    for subgrid_row in range(sqrt_n):
-        for subgrid_col in range(sqrt_n):
-            for num in range(n):
-                cells = []
-                for i in range(sqrt_n):
-                    for j in range(sqrt_n):
-                        row = subgrid_row * sqrt_n + i
-                        col = subgrid_col * sqrt_n + j
-                        cells.append((row, col))
-                
-                for (r1, c1), (r2, c2) in combinations(cells, 2):
-                    solver.add_clause([-(r1 * n * n + c1 * n + num + 1), 
-                                      -(r2 * n * n + c2 * n + num + 1)])
-    
-    # Add pre-filled cells as unit clauses
-    for row in range(n):
-        for col in range(n):
-            if sudoku_grid[row][col] != 0:
-                num = sudoku_grid[row][col] - 1
-                solver.add_clause([row * n * n + col * n + num + 1])
-    
-    return solver
+    return encode_puzzle(DavisPutnam, sudoku_grid)
 
 def solve_sudoku_dp(sudoku_grid):
     """Solve a Sudoku puzzle using the Davis-Putnam algorithm"""
@@ -214,16 +314,9 @@ def solve_sudoku_dp(sudoku_grid):
     stats = solver.get_stats()
     
     if result:
-        # Reconstruct the solution from the assignments
-        n = len(sudoku_grid)
-        solution = [[0 for _ in range(n)] for _ in range(n)]
-        for var, value in solver.assignments.items():
-            if value:  # Only consider true assignments
-                var_idx = var - 1
-                num = var_idx % n + 1
-                col = (var_idx // n) % n
-                row = var_idx // (n * n)
-                solution[row][col] = num
+        # Reconstruct the solution from the variables assigned True
+        true_vars = (literal for literal in solver.trail if literal > 0)
+        solution = decode_solution(true_vars, len(sudoku_grid))
         return solution, stats
     else:
         return None, stats
@@ -256,5 +349,6 @@ if __name__ == "__main__":
     print(f"Splitting steps: {stats['splitting_steps']}")
     print(f"Unit propagations: {stats['unit_propagations']}")
     print(f"Pure eliminations: {stats['pure_eliminations']}")
+    print(f"Unsat cache hits: {stats['unsat_cache_hits']}")
     print(f"Clauses: {stats['clauses']}")
     print(f"Time taken: {stats['time']:.4f} seconds")
@@ -1,91 +1,227 @@
+import heapq
 import time
+from array import array
+from collections import deque
 from itertools import combinations
 
+from sudoku_encoding import decode_solution, encode_puzzle
+
+def luby(i):
+    # i-th term (from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ...
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 1 << seq
+
 class CDCL:
     def __init__(self):
-        self.clauses = set()
+        # Literals of the original then learned clauses back to back, clause i
+        # spans offsets[i]:offsets[i + 1] with its two watched literals first
+        self.literals = array('i')
+        self.offsets = array('i', [0])
+        self.watches = {}  # Literal -> ids of the clauses watching it
+        self.clause_ids = {}  # Sorted literal tuple -> id of each added clause
+        self.unit_clauses = []  # Ids of unit clauses not asserted yet
+        self.prop_queue = deque()  # Assigned literals whose watches are still to be visited
         self.variables = set()
-        self.assignments = {}  # {var: (value, decision_level, antecedent_clause)}
+        # Truth of each literal once solve() has sized it: 3 for true, 1 for
+        # false, 0 for unassigned, with -literal indexing from the end
+        self.value = bytearray()
+        self.level = []  # Decision level of each assigned variable
+        self.reason = []  # Antecedent clause id of each variable, None for decisions
+        self.trail = []  # Assigned literals in assignment order
+        self.trail_lim = []  # Trail length when each decision level started
+        self.seen = bytearray()  # Per variable marks for conflict analysis
+        self.phase = bytearray()  # Last polarity of each variable, 1 for true, used for decisions
         self.decision_level = 0
         self.decision_steps = 0
         self.unit_propagations = 0
-        self.learned_clauses = set()
-        self.variable_order = []  # For VSIDS heuristic
-        self.variable_activity = {}  # For VSIDS heuristic
+        self.learned_clauses = []  # Ids of learned clauses still in use
+        self.learned_masks = {}  # Learned clause id -> bitset of its literals, bit 2 * var + (literal < 0)
+        self.learned_occurs = {}  # Literal -> ids of the learned clauses in use containing it
+        self.retired = set()  # Ids of learned clauses dropped as subsumed
+        self.order_heap = []  # (-activity, var) entries, stale ones are skipped on pop
+        self.variable_activity = [0]  # For VSIDS heuristic, indexed by variable
+        self.var_inc = 1.0  # Bump amount, grows instead of decaying every activity
+        self.conflicts = 0
+        self.restart_unit = 64  # Conflicts per Luby step
+        self.restarts = 0
+        self.restart_threshold = self.restart_unit * luby(0)
 
     def add_clause(self, clause):
         """Add a clause to the knowledge base"""
-        self.clauses.add(frozenset(clause))
-        for literal in clause:
+        literals = list(dict.fromkeys(clause))
+        key = tuple(sorted(literals))
+        if key in self.clause_ids:
+            return self.clause_ids[key]  # Already added
+        for literal in literals:
             var = abs(literal)
             self.variables.add(var)
-            if var not in self.variable_activity:
-                self.variable_activity[var] = 0
+            if var >= len(self.variable_activity):
+                self.variable_activity.extend([0] * (var + 1 - len(self.variable_activity)))
+        
+        clause_id = self.store_clause(literals)
+        self.clause_ids[key] = clause_id
+        if len(literals) == 1:
+            self.unit_clauses.append(clause_id)
+        return clause_id
+
+    def add_at_most_one(self, groups):
+        """Add the clause (-a or -b) for every pair of variables a, b of each group"""
+        # Same as add_clause([-a, -b]) without the per clause generic work
+        all_literals = self.literals
+        offsets = self.offsets
+        clause_ids = self.clause_ids
+        watches = self.watches
+        for group in groups:
+            self.variables.update(group)
+            top = max(group)
+            if top >= len(self.variable_activity):
+                self.variable_activity.extend([0] * (top + 1 - len(self.variable_activity)))
+            for a, b in combinations(group, 2):
+                key = (-a, -b) if a > b else (-b, -a)
+                if key in clause_ids:
+                    continue  # Groups can overlap, e.g. a row and a subgrid
+                clause_id = len(offsets) - 1
+                clause_ids[key] = clause_id
+                watches.setdefault(-a, []).append(clause_id)
+                watches.setdefault(-b, []).append(clause_id)
+                all_literals.append(-a)
+                all_literals.append(-b)
+                offsets.append(len(all_literals))
+
+    def copy(self):
+        """New solver with the same clauses, for solvers that have not started"""
+        other = CDCL()
+        other.literals = self.literals[:]
+        other.offsets = self.offsets[:]
+        other.watches = {literal: clause_ids[:] for literal, clause_ids in self.watches.items()}
+        other.clause_ids = dict(self.clause_ids)
+        other.unit_clauses = self.unit_clauses[:]
+        other.variables = set(self.variables)
+        other.variable_activity = self.variable_activity[:]
+        return other
+
+    def store_clause(self, literals):
+        """Append a clause and watch its first two literals"""
+        clause_id = len(self.offsets) - 1
+        self.literals.extend(literals)
+        self.offsets.append(len(self.literals))
+        for literal in literals[:2]:
+            self.watches.setdefault(literal, []).append(clause_id)
+        return clause_id
+
+    def get_clause(self, clause_id):
+        """Copy of the literals of a clause"""
+        return self.literals[self.offsets[clause_id]:self.offsets[clause_id + 1]]
+
+    def is_satisfied(self, clause):
+        """Check whether some literal of the clause is true"""
+        return any(self.value[literal] == 3 for literal in clause)
 
     def bump_variable_activity(self, var):
         """Increase activity for a variable (VSIDS heuristic)"""
-        self.variable_activity[var] += 1
+        self.variable_activity[var] += self.var_inc
 
     def decay_variable_activities(self):
         """Decay all variable activities (VSIDS heuristic)"""
-        for var in self.variable_activity:
-            self.variable_activity[var] *= 0.95
+        # Bumping later conflicts harder keeps the same relative order
+        self.var_inc /= 0.95
+        if self.var_inc > 1e100:
+            # Rescale everything to keep activities in floating point range,
+            # the heap entries of the unassigned variables have to follow
+            self.variable_activity = [activity * 1e-100 for activity in self.variable_activity]
+            self.var_inc *= 1e-100
+            self.order_heap = [(-self.variable_activity[var], var)
+                               for var in self.variables if not self.value[var]]
+            heapq.heapify(self.order_heap)
+
+    def enqueue(self, literal, antecedent):
+        """Make a literal true and queue it for propagation, False if it is already false"""
+        value = self.value
+        if value[literal]:
+            return value[literal] == 3
+        value[literal] = 3
+        value[-literal] = 1
+        var = abs(literal)
+        self.level[var] = self.decision_level
+        self.reason[var] = antecedent
+        self.trail.append(literal)
+        self.prop_queue.append(literal)
+        if antecedent is not None:
+            self.bump_variable_activity(var)
+        return True
 
     def unit_propagate(self):
         """Perform unit propagation until no more unit clauses exist"""
-        changed = True
-        while changed:
-            changed = False
-            unit_clauses = [c for c in self.clauses.union(self.learned_clauses) if len(c) == 1]
-            
-            for clause in unit_clauses:
-                self.unit_propagations += 1
-                literal = next(iter(clause))
-                var = abs(literal)
-                value = literal > 0
+        while self.unit_clauses:
+            clause_id = self.unit_clauses.pop()
+            self.unit_propagations += 1
+            if not self.enqueue(self.literals[self.offsets[clause_id]], clause_id):
+                return (False, self.get_clause(clause_id))  # Conflict detected
+        
+        # Only the clauses watching a literal that just became false can turn
+        # unit. The loop runs once per visited watch, so no attribute lookups
+        # or method calls in here
+        value = self.value
+        var_level = self.level
+        reason = self.reason
+        all_literals = self.literals
+        offsets = self.offsets
+        watches = self.watches
+        trail = self.trail
+        prop_queue = self.prop_queue
+        activity = self.variable_activity
+        var_inc = self.var_inc
+        level = self.decision_level
+        while prop_queue:
+            false_lit = -prop_queue.popleft()
+            watchers = watches.get(false_lit, [])
+            i = 0
+            while i < len(watchers):
+                clause_id = watchers[i]
+                start = offsets[clause_id]
+                first = all_literals[start]
+                if first == false_lit:
+                    first = all_literals[start] = all_literals[start + 1]
+                    all_literals[start + 1] = false_lit
                 
-                # Skip if already assigned
-                if var in self.assignments:
-                    if self.assignments[var][0] != value:
-                        # Conflict detected
-                        return (False, clause)
+                # Satisfied by the other watch
+                first_value = value[first]
+                if first_value == 3:
+                    i += 1
                     continue
                 
-                # Add the assignment with current decision level and antecedent clause
-                self.assignments[var] = (value, self.decision_level, clause)
-                
-                # Bump activity for variables in the clause
-                for lit in clause:
-                    self.bump_variable_activity(abs(lit))
-                
-                # Remove all clauses containing this literal (they're satisfied)
-                self.clauses = {c for c in self.clauses if literal not in c}
-                self.learned_clauses = {c for c in self.learned_clauses if literal not in c}
-                
-                # Remove negations of this literal from all clauses
-                new_clauses = set()
-                for c in self.clauses:
-                    if -literal in c:
-                        new_clause = c - {-literal}
-                        if not new_clause:  # Empty clause found - conflict
-                            return (False, c)
-                        new_clauses.add(new_clause)
-                    else:
-                        new_clauses.add(c)
-                self.clauses = new_clauses
-                
-                new_learned = set()
-                for c in self.learned_clauses:
-                    if -literal in c:
-                        new_clause = c - {-literal}
-                        if not new_clause:  # Empty clause found - conflict
-                            return (False, c)
-                        new_learned.add(new_clause)
-                    else:
-                        new_learned.add(c)
-                self.learned_clauses = new_learned
-                
-                changed = True
+                # Move the watch to a literal that is not false
+                for k in range(start + 2, offsets[clause_id + 1]):
+                    literal = all_literals[k]
+                    if value[literal] != 1:
+                        all_literals[start + 1], all_literals[k] = literal, false_lit
+                        watches.setdefault(literal, []).append(clause_id)
+                        watchers[i] = watchers[-1]
+                        watchers.pop()
+                        break
+                else:
+                    # Every other literal is false: the clause is unit or conflicting
+                    if first_value:
+                        prop_queue.clear()
+                        return (False, all_literals[start:offsets[clause_id + 1]])  # Conflict detected
+                    self.unit_propagations += 1
+                    # Same as enqueue(first, clause_id)
+                    value[first] = 3
+                    value[-first] = 1
+                    var = abs(first)
+                    var_level[var] = level
+                    reason[var] = clause_id
+                    trail.append(first)
+                    prop_queue.append(first)
+                    activity[var] += var_inc
+                    i += 1
         
         return (True, None)
 
@@ -94,72 +230,138 @@ class CDCL:
         if self.decision_level == 0:
             return None  # Top-level conflict
         
-        # Get all variables in the conflict clause that were assigned at current decision level
-        current_level_vars = []
-        for literal in conflict_clause:
-            var = abs(literal)
-            if var in self.assignments and self.assignments[var][1] == self.decision_level:
-                current_level_vars.append(var)
+        # 1st UIP: walk the trail backwards resolving on current level
+        # literals until only one of them is left, marking variables in seen
+        var_level = self.level
+        reason = self.reason
+        trail = self.trail
+        seen = self.seen
+        learned_clause = [0]  # Slot 0 is reserved for the asserting literal
+        counter = 0  # Marked current level variables not resolved yet
+        index = len(trail) - 1
+        clause = conflict_clause
+        literal = 0
         
-        # If only one variable at current level, we can backtrack further
-        while len(current_level_vars) == 1:
-            var = current_level_vars[0]
-            antecedent = self.assignments[var][2]
-            if antecedent is None:  # Decision variable
-                break
+        while True:
+            for other in clause:
+                var = abs(other)
+                if other == literal or seen[var]:
+                    continue
+                level = var_level[var]
+                if level == 0:
+                    continue  # False for good, never needed in the clause
+                seen[var] = 1
+                if level == self.decision_level:
+                    counter += 1
+                else:
+                    learned_clause.append(other)
             
-            # Resolve the conflict clause with the antecedent
-            new_conflict = (conflict_clause - {-var}).union(antecedent - {var})
-            conflict_clause = new_conflict
+            # Most recent marked literal on the trail
+            while not seen[abs(trail[index])]:
+                index -= 1
+            literal = trail[index]
+            index -= 1
+            seen[abs(literal)] = 0
+            counter -= 1
+            if counter == 0:
+                break  # literal is the 1st UIP
             
-            # Find new current level variables
-            current_level_vars = []
-            for literal in conflict_clause:
-                var = abs(literal)
-                if var in self.assignments and self.assignments[var][1] == self.decision_level:
-                    current_level_vars.append(var)
+            # Resolve with its antecedent
+            clause = self.get_clause(reason[abs(literal)])
         
-        # Create the learned clause
-        learned_clause = frozenset(conflict_clause)
-        self.learned_clauses.add(learned_clause)
+        learned_clause[0] = -literal
         
-        # Find the backtrack level (second highest decision level in the learned clause)
-        decision_levels = []
-        for literal in learned_clause:
-            var = abs(literal)
-            if var in self.assignments:
-                decision_levels.append(self.assignments[var][1])
+        # Drop the literals implied by the rest of the clause. Variables
+        # shown to be implied stay marked until the end, like the clause ones
+        to_clear = []
+        minimized = [learned_clause[0]]
+        for other in learned_clause[1:]:
+            if reason[abs(other)] is None or not self.is_redundant(other, to_clear):
+                minimized.append(other)
+        for other in learned_clause[1:]:
+            seen[abs(other)] = 0
+        for var in to_clear:
+            seen[var] = 0
+        learned_clause = minimized
         
-        if len(decision_levels) > 1:
-            decision_levels.sort(reverse=True)
-            backtrack_level = decision_levels[1]
-        else:
-            backtrack_level = 0
+        # Backtrack to the highest level among the other literals, which go
+        # to slot 1 so that both watches are on the right literals
+        backtrack_level = 0
+        if len(learned_clause) > 1:
+            max_i = max(range(1, len(learned_clause)), key=lambda i: var_level[abs(learned_clause[i])])
+            learned_clause[1], learned_clause[max_i] = learned_clause[max_i], learned_clause[1]
+            backtrack_level = var_level[abs(learned_clause[1])]
         
         return (learned_clause, backtrack_level)
 
+    def is_redundant(self, literal, to_clear):
+        """Check whether a learned clause literal follows from the marked literals"""
+        # Depth first through the antecedents: everything reached must be
+        # marked in seen or false at level 0, and no decision may be reached
+        var_level = self.level
+        reason = self.reason
+        all_literals = self.literals
+        offsets = self.offsets
+        seen = self.seen
+        top = len(to_clear)
+        stack = [literal]
+        while stack:
+            antecedent = reason[abs(stack.pop())]
+            for other in all_literals[offsets[antecedent]:offsets[antecedent + 1]]:
+                var = abs(other)
+                if seen[var]:
+                    continue
+                if var_level[var] == 0:
+                    continue
+                antecedent = reason[var]
+                if antecedent is None or len(stack) == 32:
+                    # Not implied, or too costly to tell: undo this call's marks
+                    for var in to_clear[top:]:
+                        seen[var] = 0
+                    del to_clear[top:]
+                    return False
+                seen[var] = 1
+                to_clear.append(var)
+                stack.append(other)
+        return True
+
     def choose_literal(self):
         """Select an unassigned variable using VSIDS heuristic"""
-        unassigned = [var for var in self.variables if var not in self.assignments]
-        if not unassigned:
-            return None
-        
-        # Sort by activity (VSIDS heuristic)
-        unassigned.sort(key=lambda var: -self.variable_activity.get(var, 0))
-        return unassigned[0]
+        # Pop the most active variable whose entry is current and which is unassigned
+        heap = self.order_heap
+        while heap:
+            neg_activity, var = heapq.heappop(heap)
+            if not self.value[var] and -neg_activity == self.variable_activity[var]:
+                return var
+        return None
 
     def solve(self):
         """Execute the CDCL algorithm"""
+        num_vars = len(self.variable_activity) - 1
+        self.value = bytearray(2 * num_vars + 1)
+        self.level = [0] * (num_vars + 1)
+        self.reason = [None] * (num_vars + 1)
+        
         # Initial unit propagation
         result, conflict_clause = self.unit_propagate()
         if not result:
             return False
         
-        # If all clauses are satisfied, we're done
-        if not self.clauses and not any(len(c) > 0 for c in self.learned_clauses):
-            return True
+        self.seen = bytearray(len(self.variable_activity))
+        self.phase = bytearray(len(self.variable_activity))  # Start from False
+        self.order_heap = [(-self.variable_activity[var], var) for var in self.variables]
+        heapq.heapify(self.order_heap)
         
         while True:
+            # Restart on the Luby schedule once propagation is done, learned
+            # clauses and saved phases keep what was found so far
+            if self.conflicts >= self.restart_threshold:
+                self.restarts += 1
+                self.restart_threshold = self.conflicts + self.restart_unit * luby(self.restarts)
+                if self.decision_level > 0:
+                    self.backtrack(0)
+                    self.decision_level = 0
+            
             # Choose a literal to branch on
             var = self.choose_literal()
             if var is None:
@@ -167,9 +369,10 @@ class CDCL:
             
             self.decision_steps += 1
             self.decision_level += 1
+            self.trail_lim.append(len(self.trail))
             
-            # Try assigning the literal to True first
-            self.assignments[var] = (True, self.decision_level, None)
+            # Phase saving: reuse the polarity the variable last had
+            self.enqueue(var if self.phase[var] else -var, None)
             
             while True:
                 result, conflict_clause = self.unit_propagate()
@@ -177,6 +380,7 @@ class CDCL:
                     break  # No conflict
                 
                 # Analyze conflict and learn clause
+                self.conflicts += 1
                 analysis_result = self.analyze_conflict(conflict_clause)
                 if analysis_result is None:
                     return False  # Unsatisfiable
@@ -187,97 +391,75 @@ class CDCL:
                 self.backtrack(backtrack_level)
                 self.decision_level = backtrack_level
                 
-                if self.decision_level == 0:
-                    # We've backtracked all the way to the top
-                    self.learned_clauses.add(learned_clause)
-                
-                # Add the learned clause and propagate
-                self.clauses.add(learned_clause)
+                # Add the learned clause, it is now unit and forces the next assignment
+                clause_id = self.learn_clause(learned_clause)
                 self.decay_variable_activities()
-                
-                # The learned clause should now be unit, forcing the next assignment
-                result, _ = self.unit_propagate()
-                if not result:
-                    continue  # Another conflict, repeat analysis
-            
-            # If we get here, the current assignments are consistent
-            # Continue with next decision if needed
+                self.enqueue(learned_clause[0], clause_id)
+
+    def learn_clause(self, learned_clause):
+        """Store a learned clause and retire the learned clauses it subsumes"""
+        mask = 0
+        for literal in learned_clause:
+            mask |= 1 << (2 * abs(literal) + (literal < 0))
+        
+        # A clause subsuming the new one is false at the conflict too, which
+        # propagation practically always reports first, so only the converse
+        # is checked. Clauses containing the new one contain its rarest literal
+        occurs = self.learned_occurs
+        rarest = min(learned_clause, key=lambda literal: len(occurs.get(literal, ())))
+        for other_id in list(occurs.get(rarest, ())):
+            if self.learned_masks[other_id] & mask == mask:
+                self.retire_clause(other_id)
+        
+        clause_id = self.store_clause(learned_clause)
+        self.learned_clauses.append(clause_id)
+        self.learned_masks[clause_id] = mask
+        for literal in learned_clause:
+            occurs.setdefault(literal, []).append(clause_id)
+        return clause_id
+
+    def retire_clause(self, clause_id):
+        """Stop watching a learned clause, unless it is the reason of an assignment"""
+        start, end = self.offsets[clause_id], self.offsets[clause_id + 1]
+        if self.reason[abs(self.literals[start])] == clause_id:
+            return
+        for literal in self.literals[start:min(start + 2, end)]:
+            self.watches[literal].remove(clause_id)
+        for literal in self.literals[start:end]:
+            self.learned_occurs[literal].remove(clause_id)
+        del self.learned_masks[clause_id]
+        self.learned_clauses.remove(clause_id)
+        self.retired.add(clause_id)
 
     def backtrack(self, backtrack_level):
         """Backtrack to the specified decision level"""
-        to_remove = []
-        for var, (value, level, _) in self.assignments.items():
-            if level > backtrack_level:
-                to_remove.append(var)
-        
-        for var in to_remove:
-            del self.assignments[var]
+        # Only the trail above the level's start has to be undone
+        lim = self.trail_lim[backtrack_level]
+        del self.trail_lim[backtrack_level:]
+        value = self.value
+        while len(self.trail) > lim:
+            literal = self.trail.pop()
+            var = abs(literal)
+            self.phase[var] = literal > 0
+            value[literal] = value[-literal] = 0
+            self.reason[var] = None
+            # Activities only change while assigned, so this entry stays current
+            heapq.heappush(self.order_heap, (-self.variable_activity[var], var))
 
     def get_stats(self):
         return {
             "decision_steps": self.decision_steps,
             "unit_propagations": self.unit_propagations,
-            "clauses": len(self.clauses),
+            "clauses": sum(1 for clause_id in range(len(self.offsets) - 1)
+                           if clause_id not in self.retired and not self.is_satisfied(self.get_clause(clause_id))),
             "learned_clauses": len(self.learned_clauses),
-            "assignments": len(self.assignments)
+            "restarts": self.restarts,
+            "assignments": len(self.trail)
         }
 
 def encode_sudoku(sudoku_grid):
     """Encode a Sudoku puzzle as propositional clauses for CDCL"""
-    n = len(sudoku_grid)
-    sqrt_n = int(n ** 0.5)
-    cdcl = CDCL()
-    
-    # Each cell contains at least one number (1..n)
-    for row in range(n):
-        for col in range(n):
-            clause = [row * n * n + col * n + num + 1 for num in range(n)]
-            cdcl.add_clause(clause)
-    
-    # Each cell contains at most one number
-    for row in range(n):
-        for col in range(n):
-            for num1, num2 in combinations(range(n), 2):
-                cdcl.add_clause([-(row * n * n + col * n + num1 + 1), 
-                               -(row * n * n + col * n + num2 + 1)])
-    
-    # Each number appears at most once in each row
-    for row in range(n):
-        for num in range(n):
-            for col1, col2 in combinations(range(n), 2):
-                cdcl.add_clause([-(row * n * n + col1 * n + num + 1), 
-                               -(row * n * n + col2 * n + num + 1)])
-    
-    # Each number appears at most once in each column
-    for col in range(n):
-        for num in range(n):
-            for row1, row2 in combinations(range(n), 2):
-                cdcl.add_clause([-(row1 * n * n + col * n + num + 1), 
-                                -(row2 * n * n + col * n + num + 1)])
-    
-    # Each number appears at most once in each subgrid
-    for subgrid_row in range(sqrt_n):
-        for subgrid_col in range(sqrt_n):
-            for num in range(n):
-                cells = []
-                for i in range(sqrt_n):
-                    for j in range(sqrt_n):
-                        row = subgrid_row * sqrt_n + i
-                        col = subgrid_col * sqrt_n + j
-                        cells.append((row, col))
-                
-                for (r1, c1), (r2, c2) in combinations(cells, 2):
-                    cdcl.add_clause([-(r1 * n * n + c1 * n + num + 1), 
-                                    -(r2 * n * n + c2 * n + num + 1)])
-    
-    # Add pre-filled cells as unit clauses
-    for row in range(n):
-        for col in range(n):
-            if sudoku_grid[row][col] != 0:
-                num = sudoku_grid[row][col] - 1
-                cdcl.add_clause([row * n * n + col * n + num + 1])
-    
-    return cdcl
+    return encode_puzzle(CDCL, sudoku_grid)
 
 def solve_sudoku_cdcl(sudoku_grid):
     """Solve a Sudoku puzzle using the CDCL algorithm"""
@@ -290,16 +472,9 @@ def solve_sudoku_cdcl(sudoku_grid):
     stats['time'] = end_time - start_time
     
     if result:
-        # Reconstruct the solution from the assignments
-        n = len(sudoku_grid)
-        solution = [[0 for _ in range(n)] for _ in range(n)]
-        for var, (value, _, _) in cdcl.assignments.items():
-            if value:  # Only consider true assignments
-                var_idx = var - 1
-                num = var_idx % n + 1
-                col = (var_idx // n) % n
-                row = var_idx // (n * n)
-                solution[row][col] = num
+        # Reconstruct the solution from the variables assigned True
+        true_vars = (literal for literal in cdcl.trail if literal > 0)
+        solution = decode_solution(true_vars, len(sudoku_grid))
         return solution, stats
     else:
         return None, stats
@@ -0,0 +1,81 @@
+from functools import lru_cache
+
+# Solvers used here need add_clause(literals), add_at_most_one(groups) for
+# the pairwise (-a or -b) clauses, and copy() for a solver not started yet
+
+@lru_cache(maxsize=8)
+def sudoku_rules(solver_class, n):
+    """Solver holding the clauses shared by every n x n Sudoku puzzle"""
+    sqrt_n = int(n ** 0.5)
+    solver = solver_class()
+    
+    # Variable of each (row, col, num), with num counted from 0
+    var = [[[row * n * n + col * n + num + 1 for num in range(n)] for col in range(n)] for row in range(n)]
+    
+    # Each cell contains at least one number (1..n)
+    for row in range(n):
+        for col in range(n):
+            solver.add_clause(var[row][col])
+    
+    # Groups of variables of which at most one can be true
+    groups = []
+    
+    # Each cell contains at most one number
+    groups.extend(var[row][col] for row in range(n) for col in range(n))
+    
+    # Each number appears at most once in each row
+    groups.extend([var[row][col][num] for col in range(n)] for row in range(n) for num in range(n))
+    
+    # Each number appears at most once in each column
+    groups.extend([var[row][col][num] for row in range(n)] for col in range(n) for num in range(n))
+    
+    # Each number appears at most once in each subgrid
+    for subgrid_row in range(sqrt_n):
+        for subgrid_col in range(sqrt_n):
+            for num in range(n):
+                groups.append([var[subgrid_row * sqrt_n + i][subgrid_col * sqrt_n + j][num]
+                               for i in range(sqrt_n) for j in range(sqrt_n)])
+    
+    solver.add_at_most_one(groups)
+    return solver
+
+def encode_puzzle(solver_class, sudoku_grid):
+    """Encode a Sudoku puzzle as propositional clauses for a new solver_class solver"""
+    # Only the pre-filled cells differ between puzzles of the same size
+    n = len(sudoku_grid)
+    solver = sudoku_rules(solver_class, n).copy()
+    
+    # Add pre-filled cells as unit clauses
+    for row in range(n):
+        for col in range(n):
+            if sudoku_grid[row][col] != 0:
+                solver.add_clause([row * n * n + col * n + sudoku_grid[row][col]])
+    
+    return solver
+
+def decode_solution(true_vars, n):
+    """Grid of an n x n Sudoku from the variables assigned True"""
+    solution = [[0] * n for _ in range(n)]
+    for var in true_vars:
+        # var - 1 == (row * n + col) * n + num with num counted from 0
+        cell, num = divmod(var - 1, n)
+        row, col = divmod(cell, n)
+        solution[row][col] = num + 1
+    return solution
+
+def is_valid_solution(solution, sudoku_grid):
+    """Whether a grid fills in every cell of the puzzle without breaking a Sudoku rule"""
+    n = len(sudoku_grid)
+    sqrt_n = int(n ** 0.5)
+    numbers = set(range(1, n + 1))
+    
+    # Every pre-filled cell is kept
+    if any(sudoku_grid[row][col] not in (0, solution[row][col]) for row in range(n) for col in range(n)):
+        return False
+    
+    # Each row, column and subgrid holds every number once
+    units = [solution[row] for row in range(n)]
+    units.extend([solution[row][col] for row in range(n)] for col in range(n))
+    units.extend([solution[subgrid_row + i][subgrid_col + j] for i in range(sqrt_n) for j in range(sqrt_n)]
+                 for subgrid_row in range(0, n, sqrt_n) for subgrid_col in range(0, n, sqrt_n))
+    return all(len(unit) == n and set(unit) == numbers for unit in units)
@@ -1,121 +1,538 @@
+import heapq
 import time
+from array import array
 from itertools import combinations
 
+from sudoku_encoding import decode_solution
+
+def luby(i):
+    # i-th term (from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ...
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 1 << seq
+
 class DPLL:
+    # Literals are stored as 2 * var + (literal < 0): the variable is
+    # literal >> 1, the negation literal ^ 1 and the bit of the literal in a
+    # literal bitset is 1 << literal. The add_* methods take signed literals
+
     def __init__(self):
-        self.clauses = set()
+        # Literals of all clauses back to back, clause i spans
+        # offsets[i]:offsets[i + 1] with its two watched literals first
+        self.literals = array('i')
+        self.offsets = array('i', [0])
+        self.clause_keys = set()  # Sorted literal tuples of the clauses added so far
+        self.watches = {}  # Literal -> ids of the clauses watching it, binary ones excepted
+        self.implications = {}  # Literal -> literals its binary clauses make true along with it
+        self.unit_literals = []  # Literals of unit clauses not asserted yet
+        self.amo_groups = []  # Literals of each at-most-one group
+        self.group_masks = []  # Literal bitset of each at-most-one group
+        self.amo_peers = {}  # Literal -> bitset of the other literals of its at-most-one groups
+        self.eo_groups = []  # Ids of the groups that need a true literal
+        self.eo_occurs = {}  # Literal -> ids of the groups containing it that need a true literal
         self.variables = set()
-        self.assignments = {}
+        # Truth of each literal once solve() has sized it: 3 for true, 1 for
+        # false, 0 for unassigned
+        self.value = bytearray()
+        self.trail = []  # Assigned literals in order, undone on backtrack
+        self.trail_lim = []  # Trail length before each decision
+        self.true_mask = 0  # Bitset of the true literals
+        self.false_mask = 0  # Bitset of the false literals
+        self.mask_lim = []  # (true_mask, false_mask) before each decision
+        self.qhead = 0  # Trail index of the next literal whose watches are to be visited
+        self.level = []  # Decision level of each assigned variable
+        # Literals that forced each assigned variable, all false but its own
+        # one: a clause, a group or a pair. None for decisions
+        self.reason = []
+        self.seen = bytearray()  # Per variable marks for conflict analysis
+        self.learned_clauses = 0
+        self.pure_eliminations = 0
+        self.conflicts = 0
+        self.restart_unit = 100  # Conflicts per Luby step
+        self.restarts = 0
+        self.restart_threshold = self.restart_unit * luby(0)
+        self.phase = bytearray()  # Last polarity of each variable, 1 for true, tried first
+        self.order_heap = []  # (-activity, var) entries, stale ones are skipped on pop
+        # For VSIDS heuristic, indexed by variable. Fixed point with 16
+        # fractional bits, so that bumps and heap comparisons stay on integers
+        self.variable_activity = array('I')
+        self.var_inc = 1 << 16  # Bump amount, grows instead of decaying every activity
         self.decision_steps = 0
         self.unit_propagations = 0
 
     def add_clause(self, clause):
         """Add a clause to the knowledge base"""
-        self.clauses.add(frozenset(clause))
-        for literal in clause:
-            self.variables.add(abs(literal))
+        literals = list(dict.fromkeys(2 * abs(literal) + (literal < 0) for literal in clause))
+        key = tuple(sorted(literals))
+        if key in self.clause_keys:
+            return  # Already added
+        self.clause_keys.add(key)
+        for literal in literals:
+            self.variables.add(literal >> 1)
+        
+        if len(literals) == 1:
+            self.unit_literals.append(literals[0])
+        else:
+            self.store_clause(literals)
+
+    def store_clause(self, literals):
+        """Append a clause and watch its first two literals"""
+        clause_id = len(self.offsets) - 1
+        self.literals.extend(literals)
+        self.offsets.append(len(self.literals))
+        if len(literals) == 2:
+            # (a or b) is -a -> b and -b -> a, no watches to move around
+            a, b = literals
+            self.implications.setdefault(a ^ 1, []).append(b)
+            self.implications.setdefault(b ^ 1, []).append(a)
+        else:
+            for literal in literals[:2]:
+                self.watches.setdefault(literal, []).append(clause_id)
+        return clause_id
+
+    def add_at_most_one(self, literals):
+        """Require at most one of the literals to be true"""
+        # One group propagates like the clause (-a or -b) for every pair a, b
+        # of its literals, without storing or watching the pairs
+        group = array('i', (2 * abs(literal) + (literal < 0) for literal in literals))
+        group_id = len(self.amo_groups)
+        self.amo_groups.append(group)
+        group_mask = 0
+        for literal in group:
+            self.variables.add(literal >> 1)
+            group_mask |= 1 << literal
+        self.group_masks.append(group_mask)
+        for literal in group:
+            self.amo_peers[literal] = self.amo_peers.get(literal, 0) | group_mask & ~(1 << literal)
+        return group_id
+
+    def add_exactly_one(self, literals):
+        """Require exactly one of the literals to be true"""
+        # The at-least-one half is checked on the group when one of its
+        # literals becomes false, instead of watching a clause
+        group_id = self.add_at_most_one(literals)
+        self.eo_groups.append(group_id)
+        for literal in self.amo_groups[group_id]:
+            self.eo_occurs.setdefault(literal, []).append(group_id)
+
+    def enqueue(self, literal, antecedent):
+        """Make a literal true and queue it for propagation, False if it is already false"""
+        value = self.value
+        if value[literal]:
+            return value[literal] == 3
+        value[literal] = 3
+        value[literal ^ 1] = 1
+        var = literal >> 1
+        self.true_mask |= 1 << literal
+        self.false_mask |= 1 << (literal ^ 1)
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = antecedent
+        self.trail.append(literal)
+        return True
 
     def unit_propagate(self):
         """Perform unit propagation until no more unit clauses exist"""
-        changed = True
-        while changed:
-            changed = False
-            unit_clauses = [c for c in self.clauses if len(c) == 1]
+        while self.unit_literals:
+            self.unit_propagations += 1
+            literal = self.unit_literals.pop()
+            if not self.enqueue(literal, None):
+                return (False, [literal])  # Conflict detected
+        
+        # Only the clauses watching a literal that just became false can turn
+        # unit, the others are left alone. The trail doubles as the queue of
+        # literals to visit, and the loop runs once per visited watch, so no
+        # attribute lookups or method calls in here
+        value = self.value
+        var_level = self.level
+        reason = self.reason
+        level = len(self.trail_lim)
+        all_literals = self.literals
+        offsets = self.offsets
+        watches = self.watches
+        implications = self.implications
+        amo_groups = self.amo_groups
+        group_masks = self.group_masks
+        amo_peers = self.amo_peers
+        eo_occurs = self.eo_occurs
+        true_mask = self.true_mask
+        false_mask = self.false_mask
+        trail = self.trail
+        qhead = self.qhead
+        propagations = 0
+        # The conflict returns leave the masks behind, backtracking restores them
+        while qhead < len(trail):
+            true_lit = trail[qhead]
+            qhead += 1
             
-            for clause in unit_clauses:
-                self.unit_propagations += 1
-                literal = next(iter(clause))
-                var = abs(literal)
-                value = literal > 0
-                
-                # Add the assignment
-                self.assignments[var] = value
-                
-                # Remove all clauses containing this literal (they're satisfied)
-                self.clauses = {c for c in self.clauses if literal not in c}
+            # The other literals of its at-most-one groups all become false,
+            # the ones that already are cost nothing
+            peers = amo_peers.get(true_lit)
+            if peers:
+                both = peers & true_mask
+                if both:
+                    other = (both & -both).bit_length() - 1
+                    self.qhead = len(trail)
+                    self.unit_propagations += propagations
+                    return (False, (true_lit ^ 1, other ^ 1))  # Two true literals in a group
+                forced = peers & ~false_mask
+                while forced:
+                    low_bit = forced & -forced
+                    forced ^= low_bit
+                    implied = (low_bit.bit_length() - 1) ^ 1
+                    propagations += 1
+                    value[implied] = 3
+                    value[implied ^ 1] = 1
+                    true_mask |= 1 << implied
+                    false_mask |= low_bit
+                    var = implied >> 1
+                    var_level[var] = level
+                    reason[var] = (implied, true_lit ^ 1)
+                    trail.append(implied)
+            
+            # Binary clauses imply their other literal directly
+            for implied in implications.get(true_lit, ()):
+                implied_value = value[implied]
+                if implied_value == 3:
+                    continue
+                if implied_value:
+                    self.qhead = len(trail)
+                    self.unit_propagations += propagations
+                    return (False, (implied, true_lit ^ 1))  # Conflict detected
+                propagations += 1
+                value[implied] = 3
+                value[implied ^ 1] = 1
+                true_mask |= 1 << implied
+                false_mask |= 1 << (implied ^ 1)
+                var = implied >> 1
+                var_level[var] = level
+                reason[var] = (implied, true_lit ^ 1)
+                trail.append(implied)
+            
+            false_lit = true_lit ^ 1
+            
+            # An exactly-one group without a true literal and with a single
+            # one that is not false forces it
+            for group_id in eo_occurs.get(false_lit, ()):
+                group_mask = group_masks[group_id]
+                if group_mask & true_mask:
+                    continue  # Satisfied
+                open_mask = group_mask & ~false_mask
+                if open_mask & (open_mask - 1):
+                    continue  # Still two open literals
+                if not open_mask:
+                    self.qhead = len(trail)
+                    self.unit_propagations += propagations
+                    return (False, amo_groups[group_id])  # Every literal of the group is false
+                unit = open_mask.bit_length() - 1
+                propagations += 1
+                value[unit] = 3
+                value[unit ^ 1] = 1
+                true_mask |= open_mask
+                false_mask |= 1 << (unit ^ 1)
+                var = unit >> 1
+                var_level[var] = level
+                reason[var] = amo_groups[group_id]
+                trail.append(unit)
+            
+            watchers = watches.get(false_lit, [])
+            i = 0
+            while i < len(watchers):
+                clause_id = watchers[i]
+                start = offsets[clause_id]
+                first = all_literals[start]
+                if first == false_lit:
+                    first = all_literals[start] = all_literals[start + 1]
+                    all_literals[start + 1] = false_lit
                 
-                # Remove negations of this literal from all clauses
-                new_clauses = set()
-                for c in self.clauses:
-                    if -literal in c:
-                        new_clause = c - {-literal}
-                        if not new_clause:  # Empty clause found
-                            return False
-                        new_clauses.add(new_clause)
-                    else:
-                        new_clauses.add(c)
+                # Satisfied by the other watch
+                first_value = value[first]
+                if first_value == 3:
+                    i += 1
+                    continue
                 
-                self.clauses = new_clauses
-                changed = True
+                # Move the watch to a literal that is not false
+                for k in range(start + 2, offsets[clause_id + 1]):
+                    literal = all_literals[k]
+                    if value[literal] != 1:
+                        all_literals[start + 1], all_literals[k] = literal, false_lit
+                        watches.setdefault(literal, []).append(clause_id)
+                        watchers[i] = watchers[-1]
+                        watchers.pop()
+                        break
+                else:
+                    # Every other literal is false: the clause is unit or conflicting
+                    if first_value:
+                        self.qhead = len(trail)
+                        self.unit_propagations += propagations
+                        return (False, all_literals[start:offsets[clause_id + 1]])  # Conflict detected
+                    propagations += 1
+                    value[first] = 3  # Same as enqueue(first, <clause>)
+                    value[first ^ 1] = 1
+                    true_mask |= 1 << first
+                    false_mask |= 1 << (first ^ 1)
+                    var = first >> 1
+                    var_level[var] = level
+                    reason[var] = all_literals[start:offsets[clause_id + 1]]
+                    trail.append(first)
+                    i += 1
         
-        return True
+        self.true_mask = true_mask
+        self.false_mask = false_mask
+        self.qhead = qhead
+        self.unit_propagations += propagations
+        return (True, None)
 
-    def choose_literal(self):
-        """Select an unassigned variable using some heuristic"""
-        unassigned = [var for var in self.variables if var not in self.assignments]
-        return unassigned[0] if unassigned else None
-
-    def solve(self):
-        """Execute the DPLL algorithm with backtracking"""
-        # First, perform unit propagation
-        if not self.unit_propagate():
-            return False
+    def analyze_conflict(self, conflict_clause):
+        """Analyze the conflict and learn a new clause"""
+        # 1st UIP: walk the trail backwards resolving on current level
+        # literals until only one of them is left, marking variables in seen
+        var_level = self.level
+        reason = self.reason
+        trail = self.trail
+        seen = self.seen
+        decision_level = len(self.trail_lim)
+        learned_clause = [0]  # Slot 0 is reserved for the asserting literal
+        counter = 0  # Marked current level variables not resolved yet
+        index = len(trail) - 1
+        clause = conflict_clause
+        literal = 0
         
-        # If all clauses are satisfied, we're done
-        if not self.clauses:
-            return True
+        while True:
+            for other in clause:
+                var = other >> 1
+                if other == literal or seen[var]:
+                    continue
+                level = var_level[var]
+                if level == 0:
+                    continue  # False for good, never needed in the clause
+                seen[var] = 1
+                self.bump_variable_activity(var)
+                if level == decision_level:
+                    counter += 1
+                else:
+                    learned_clause.append(other)
+            
+            # Most recent marked literal on the trail
+            while not seen[trail[index] >> 1]:
+                index -= 1
+            literal = trail[index]
+            index -= 1
+            seen[literal >> 1] = 0
+            counter -= 1
+            if counter == 0:
+                break  # literal is the 1st UIP
+            
+            # Resolve with its antecedent
+            clause = reason[literal >> 1]
         
-        # Choose a literal to branch on
-        literal = self.choose_literal()
-        if literal is None:
-            return False  # Shouldn't happen if problem is satisfiable
+        learned_clause[0] = literal ^ 1
+        for other in learned_clause[1:]:
+            seen[other >> 1] = 0
         
-        self.decision_steps += 1
+        # Backtrack to the highest level among the other literals, which go
+        # to slot 1 so that both watches are on the right literals
+        backtrack_level = 0
+        if len(learned_clause) > 1:
+            max_i = max(range(1, len(learned_clause)), key=lambda i: var_level[learned_clause[i] >> 1])
+            learned_clause[1], learned_clause[max_i] = learned_clause[max_i], learned_clause[1]
+            backtrack_level = var_level[learned_clause[1] >> 1]
         
-        # Try assigning the literal to True
-        self.assignments[literal] = True
-        new_clauses_true = set()
-        for c in self.clauses:
-            if -literal in c:
-                new_clause = c - {-literal}
-                if not new_clause:  # Empty clause found
-                    break
-                new_clauses_true.add(new_clause)
-            else:
-                new_clauses_true.add(c)
+        return (learned_clause, backtrack_level)
+
+    def learn_clause(self, learned_clause):
+        """Store a learned clause, watching its asserting literal and the highest level one"""
+        # A unit one is asserted at level 0 for good and needs no watch
+        if len(learned_clause) > 1:
+            self.store_clause(learned_clause)
+        self.learned_clauses += 1
+
+    def bump_variable_activity(self, var):
+        """Increase activity for a variable (VSIDS heuristic)"""
+        self.variable_activity[var] += self.var_inc
+
+    def decay_variable_activities(self):
+        """Decay all variable activities (VSIDS heuristic)"""
+        # Bumping later conflicts harder keeps the same relative order, the
+        # increment grows by 1/19 like dividing it by 0.95
+        self.var_inc += self.var_inc // 19
+        if self.var_inc > 1 << 27:
+            # An activity is at most about 20 increments, so shift everything
+            # down before it can outgrow 32 bits. The heap entries of the
+            # unassigned variables have to follow
+            self.variable_activity = array('I', (activity >> 16 for activity in self.variable_activity))
+            self.var_inc >>= 16
+            self.order_heap = [(-self.variable_activity[var], var)
+                               for var in self.variables if not self.value[2 * var]]
+            heapq.heapify(self.order_heap)
+
+    def choose_literal(self):
+        """Select an unassigned variable using VSIDS heuristic"""
+        # Pop the most active variable whose entry is current and which is unassigned
+        heap = self.order_heap
+        while heap:
+            neg_activity, var = heapq.heappop(heap)
+            if not self.value[2 * var] and -neg_activity == self.variable_activity[var]:
+                return var
+        return None
+
+    def pure_literals(self):
+        """Unassigned literals whose negation occurs in no open clause or group"""
+        value = self.value
+        occurs = set()
+        for clause_id in range(len(self.offsets) - 1):
+            literals = self.literals[self.offsets[clause_id]:self.offsets[clause_id + 1]]
+            if not any(value[literal] == 3 for literal in literals):
+                occurs.update(literal for literal in literals if not value[literal])
         
-        old_clauses = self.clauses
-        self.clauses = new_clauses_true
-        if self.solve():
-            return True
-        self.clauses = old_clauses
-        del self.assignments[literal]
+        # A group stands for the pairwise clauses (-a or -b) and, if exactly
+        # one, the clause of all its literals. Once one literal is true or
+        # only one is open, the pairs are satisfied
+        eo_groups = set(self.eo_groups)
+        for group_id, literals in enumerate(self.amo_groups):
+            if any(value[literal] == 3 for literal in literals):
+                continue
+            open_literals = [literal for literal in literals if not value[literal]]
+            if len(open_literals) > 1:
+                occurs.update(literal ^ 1 for literal in open_literals)
+            if group_id in eo_groups:
+                occurs.update(open_literals)
         
-        # Try assigning the literal to False
-        self.assignments[literal] = False
-        new_clauses_false = set()
-        for c in self.clauses:
-            if literal in c:
-                new_clause = c - {literal}
-                if not new_clause:  # Empty clause found
-                    break
-                new_clauses_false.add(new_clause)
-            else:
-                new_clauses_false.add(c)
+        return [literal for literal in occurs if literal ^ 1 not in occurs]
+
+    def jeroslow_wang_scores(self, num_vars):
+        """Two-sided Jeroslow-Wang score of each variable over the open clauses and groups"""
+        # A literal of a constraint with k literals that are not false scores
+        # 2^-k, so the variables of nearly decided constraints come first.
+        # Exactly-one groups count as their at-least-one clause. Scores are in
+        # the fixed point of the activities
+        value = self.value
+        scores = array('I', bytes(4 * (num_vars + 1)))
+        constraints = [self.literals[self.offsets[clause_id]:self.offsets[clause_id + 1]]
+                       for clause_id in range(len(self.offsets) - 1)]
+        constraints.extend(self.amo_groups[group_id] for group_id in self.eo_groups)
+        for literals in constraints:
+            if any(value[literal] == 3 for literal in literals):
+                continue  # Satisfied
+            open_literals = [literal for literal in literals if not value[literal]]
+            weight = (1 << 16) >> len(open_literals)
+            for literal in open_literals:
+                scores[literal >> 1] += weight
+        return scores
+
+    def solve(self):
+        """Search with clause learning and non-chronological backtracking"""
+        num_vars = max(self.variables, default=0)
+        self.value = bytearray(2 * num_vars + 2)
+        self.level = [0] * (num_vars + 1)
+        self.reason = [None] * (num_vars + 1)
+        self.seen = bytearray(num_vars + 1)
+        self.phase = bytearray(b'\x01') * (num_vars + 1)  # Start from True
         
-        self.clauses = new_clauses_false
-        result = self.solve()
-        self.clauses = old_clauses
+        # Level 0 first, so that the scores only count what is left open.
+        # Pure literals are only assigned here, where they need no reason
+        result, conflict_clause = self.unit_propagate()
         if not result:
-            del self.assignments[literal]
-        return result
+            return False
+        pure_literals = self.pure_literals()
+        while pure_literals:
+            for literal in pure_literals:
+                self.pure_eliminations += 1
+                self.enqueue(literal, None)
+            result, conflict_clause = self.unit_propagate()
+            if not result:
+                return False
+            pure_literals = self.pure_literals()
+        self.variable_activity = self.jeroslow_wang_scores(num_vars)
+        self.order_heap = [(-self.variable_activity[var], var) for var in self.variables]
+        heapq.heapify(self.order_heap)
+        
+        while True:
+            result, conflict_clause = self.unit_propagate()
+            if result:
+                # Restart on the Luby schedule, only level 0 is kept. Learned
+                # clauses, activities and saved phases lead back to where the
+                # search was without its bad early decisions
+                if self.conflicts >= self.restart_threshold:
+                    self.restarts += 1
+                    self.restart_threshold = self.conflicts + self.restart_unit * luby(self.restarts)
+                    if self.trail_lim:
+                        self.backtrack(0)
+                
+                # Without a conflict once every variable is assigned, all clauses are satisfied
+                var = self.choose_literal()
+                if var is None:
+                    return True
+                
+                self.decision_steps += 1
+                
+                # Try the polarity the variable last had first (phase saving)
+                self.trail_lim.append(len(self.trail))
+                self.mask_lim.append((self.true_mask, self.false_mask))
+                self.enqueue(2 * var if self.phase[var] else 2 * var + 1, None)
+                continue
+            
+            if not self.trail_lim:
+                return False  # Conflict without any decision
+            self.conflicts += 1
+            
+            # Jump back to where the learned clause is unit and assert it
+            learned_clause, backtrack_level = self.analyze_conflict(conflict_clause)
+            self.backtrack(backtrack_level)
+            self.learn_clause(learned_clause)
+            self.decay_variable_activities()
+            self.enqueue(learned_clause[0], learned_clause)
+
+    def backtrack(self, backtrack_level):
+        """Backtrack to the specified decision level"""
+        # The clauses are never rewritten, so this is all there is to undo
+        lim = self.trail_lim[backtrack_level]
+        del self.trail_lim[backtrack_level:]
+        self.true_mask, self.false_mask = self.mask_lim[backtrack_level]
+        del self.mask_lim[backtrack_level:]
+        value = self.value
+        while len(self.trail) > lim:
+            literal = self.trail.pop()
+            var = literal >> 1
+            value[literal] = value[literal ^ 1] = 0
+            self.phase[var] = not literal & 1
+            heapq.heappush(self.order_heap, (-self.variable_activity[var], var))
+        self.qhead = lim
+
+    def to_cnf(self):
+        """Signed literal clauses of everything added so far, for an external solver"""
+        # Groups become their pairwise at-most-one clauses, plus the
+        # at-least-one clause for the exactly-one ones
+        def signed(literal):
+            return -(literal >> 1) if literal & 1 else literal >> 1
+        
+        cnf = [[signed(literal)] for literal in self.unit_literals]
+        for clause_id in range(len(self.offsets) - 1):
+            cnf.append([signed(literal) for literal in self.literals[self.offsets[clause_id]:self.offsets[clause_id + 1]]])
+        for group in self.amo_groups:
+            for a, b in combinations(group, 2):
+                cnf.append([signed(a ^ 1), signed(b ^ 1)])
+        for group_id in self.eo_groups:
+            cnf.append([signed(literal) for literal in self.amo_groups[group_id]])
+        return cnf
 
     def get_stats(self):
         return {
             "decision_steps": self.decision_steps,
             "unit_propagations": self.unit_propagations,
-            "clauses": len(self.clauses),
-            "assignments": len(self.assignments)
+            "clauses": sum(1 for clause_id in range(len(self.offsets) - 1)
+                           if not any(self.value[literal] == 3
+                                      for literal in self.literals[self.offsets[clause_id]:self.offsets[clause_id + 1]])),
+            "learned_clauses": self.learned_clauses,
+            "conflicts": self.conflicts,
+            "pure_eliminations": self.pure_eliminations,
+            "restarts": self.restarts,
+            "assignments": len(self.trail)
         }
 
 def encode_sudoku(sudoku_grid):
@@ -124,79 +541,90 @@ def encode_sudoku(sudoku_grid):
     sqrt_n = int(n ** 0.5)
     dpll = DPLL()
     
-    # Each cell contains at least one number (1..n)
-    for row in range(n):
-        for col in range(n):
-            clause = [row * n * n + col * n + num + 1 for num in range(n)]
-            dpll.add_clause(clause)
+    # Variable of each (row, col, num), computed once instead of in every group
+    var = [[[row * n * n + col * n + num + 1 for num in range(n)] for col in range(n)] for row in range(n)]
     
-    # Each cell contains at most one number
+    # Each cell contains exactly one number (1..n)
     for row in range(n):
         for col in range(n):
-            for num1, num2 in combinations(range(n), 2):
-                dpll.add_clause([-(row * n * n + col * n + num1 + 1), 
-                               -(row * n * n + col * n + num2 + 1)])
+            dpll.add_exactly_one(var[row][col])
     
-    # Each number appears at most once in each row
+    # Each number appears exactly once in each row
     for row in range(n):
         for num in range(n):
-            for col1, col2 in combinations(range(n), 2):
-                dpll.add_clause([-(row * n * n + col1 * n + num + 1), 
-                               -(row * n * n + col2 * n + num + 1)])
+            dpll.add_exactly_one([var[row][col][num] for col in range(n)])
     
-    # Each number appears at most once in each column
+    # Each number appears exactly once in each column
     for col in range(n):
         for num in range(n):
-            for row1, row2 in combinations(range(n), 2):
-                dpll.add_clause([-(row1 * n * n + col * n + num + 1), 
-                                -(row2 * n * n + col * n + num + 1)])
+            dpll.add_exactly_one([var[row][col][num] for row in range(n)])
     
-    # Each number appears at most once in each subgrid
+    # Each number appears exactly once in each subgrid
     for subgrid_row in range(sqrt_n):
         for subgrid_col in range(sqrt_n):
+            cells = []
+            for i in range(sqrt_n):
+                for j in range(sqrt_n):
+                    row = subgrid_row * sqrt_n + i
+                    col = subgrid_col * sqrt_n + j
+                    cells.append(var[row][col])
+            
             for num in range(n):
-                cells = []
-                for i in range(sqrt_n):
-                    for j in range(sqrt_n):
-                        row = subgrid_row * sqrt_n + i
-                        col = subgrid_col * sqrt_n + j
-                        cells.append((row, col))
-                
-                for (r1, c1), (r2, c2) in combinations(cells, 2):
-                    dpll.add_clause([-(r1 * n * n + c1 * n + num + 1), 
-                                    -(r2 * n * n + c2 * n + num + 1)])
+                dpll.add_exactly_one([cell[num] for cell in cells])
     
     # Add pre-filled cells as unit clauses
     for row in range(n):
         for col in range(n):
             if sudoku_grid[row][col] != 0:
-                num = sudoku_grid[row][col] - 1
-                dpll.add_clause([row * n * n + col * n + num + 1])
+                dpll.add_clause([var[row][col][sudoku_grid[row][col] - 1]])
     
     return dpll
 
-def solve_sudoku_dpll(sudoku_grid):
-    """Solve a Sudoku puzzle using the DPLL algorithm"""
+def solve_sudoku_dpll(sudoku_grid, backend="dpll"):
+    """Solve a Sudoku puzzle using the DPLL algorithm, or pysat's Glucose4 with backend='pysat'"""
+    if backend not in ("dpll", "pysat"):
+        raise ValueError(f"Unknown backend: {backend}")
     dpll = encode_sudoku(sudoku_grid)
-    start_time = time.time()
-    result = dpll.solve()
-    end_time = time.time()
     
-    stats = dpll.get_stats()
+    if backend == "pysat":
+        # Optional dependency, only imported when asked for
+        try:
+            from pysat.solvers import Glucose4
+        except ImportError as error:
+            raise ImportError('backend="pysat" needs the python-sat package: pip install python-sat') from error
+        
+        cnf = dpll.to_cnf()
+        start_time = time.time()
+        with Glucose4(bootstrap_with=cnf) as solver:
+            result = solver.solve()
+            model = solver.get_model() if result else []
+            solver_stats = solver.accum_stats()
+        end_time = time.time()
+        
+        # The get_stats() keys Glucose has a count for, it does not report
+        # how many learned clauses it keeps
+        stats = {
+            "decision_steps": solver_stats.get("decisions", 0),
+            "unit_propagations": solver_stats.get("propagations", 0),
+            "clauses": len(cnf),
+            "conflicts": solver_stats.get("conflicts", 0),
+            "pure_eliminations": 0,
+            "restarts": solver_stats.get("restarts", 0),
+            "assignments": len(model)
+        }
+        true_vars = [literal for literal in model if literal > 0]
+    else:
+        start_time = time.time()
+        result = dpll.solve()
+        end_time = time.time()
+        
+        stats = dpll.get_stats()
+        true_vars = [literal >> 1 for literal in dpll.trail if not literal & 1]
     stats['time'] = end_time - start_time
     
     if result:
-        # Reconstruct the solution from the assignments
-        n = len(sudoku_grid)
-        solution = [[0 for _ in range(n)] for _ in range(n)]
-        for var, value in dpll.assignments.items():
-            if value:  # Only consider true assignments
-                var_idx = var - 1
-                num = var_idx % n + 1
-                col = (var_idx // n) % n
-                row = var_idx // (n * n)
-                solution[row][col] = num
-        return solution, stats
+        # Reconstruct the solution from the variables assigned True
+        return decode_solution(true_vars, len(sudoku_grid)), stats
     else:
         return None, stats
 
@@ -226,4 +654,19 @@ if __name__ == "__main__":
     
     print(f"Decision steps: {stats['decision_steps']}")
     print(f"Unit propagations: {stats['unit_propagations']}")
+    print(f"Learned clauses: {stats['learned_clauses']}")
+    print(f"Conflicts: {stats['conflicts']}")
+    print(f"Pure eliminations: {stats['pure_eliminations']}")
+    print(f"Restarts: {stats['restarts']}")
     print(f"Time taken: {stats['time']:.4f} seconds")
+    
+    print("\nSolving the same Sudoku with pysat's Glucose4...")
+    try:
+        pysat_solution, pysat_stats = solve_sudoku_dpll(sudoku_9x9, backend="pysat")
+    except ImportError as error:
+        print(f"Skipped: {error}")
+    else:
+        print(f"Same solution: {pysat_solution == solution}")
+        print(f"Decision steps: {pysat_stats['decision_steps']}")
+        print(f"Conflicts: {pysat_stats['conflicts']}")
+        print(f"Time taken: {pysat_stats['time']:.4f} seconds")